@@ -1,8 +1,10 @@
-from fastapi import FastAPI, HTTPException, BackgroundTasks
+from fastapi import FastAPI, HTTPException, Query, Response, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
-from typing import List, Dict, Optional, Any
-from datetime import datetime
+from abc import ABC, abstractmethod
+from typing import List, Dict, Optional, Any, Tuple, TYPE_CHECKING
+from datetime import datetime, timedelta
 from motor.motor_asyncio import AsyncIOMotorClient
 from dotenv import load_dotenv
 import os
@@ -10,15 +12,28 @@ import logging
 import uuid
 import asyncio
 import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
 from decimal import Decimal
 import json
-
-# Web3 and blockchain imports
-from web3 import Web3
-from eth_account import Account
-from solcx import compile_source, install_solc
+import base64
+import csv
+import io
+import zlib
+import threading
+import socket
+import hashlib
+import heapq
+from array import array
+from pathlib import Path
+from urllib.parse import urlsplit
 import aiohttp
 
+# Web3, eth_account and solcx are imported on first use so workers that never
+# touch the chain don't pay for them at startup
+if TYPE_CHECKING:
+    from web3 import AsyncWeb3
+
 # Load environment variables
 load_dotenv()
 
@@ -27,19 +42,6 @@ mongo_url = os.environ['MONGO_URL']
 client = AsyncIOMotorClient(mongo_url)
 db = client[os.environ['DB_NAME']]
 
-# Install Solidity compiler
-try:
-    from solcx import get_installed_solc_versions, install_solc
-    installed_versions = get_installed_solc_versions()
-    if not installed_versions or '0.8.20' not in [str(v) for v in installed_versions]:
-        print("Installing Solidity 0.8.20...")
-        install_solc('0.8.20')
-        print("Solidity 0.8.20 installed successfully")
-    else:
-        print(f"Solidity already installed: {installed_versions}")
-except Exception as e:
-    print(f"Solidity installation warning: {e}")
-
 # FastAPI app
 app = FastAPI(title="MemeForge API", version="1.0.0")
 
@@ -50,6 +52,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
 # Logging setup
@@ -57,6 +60,9 @@ logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 # ============= MODELS =============
+# Largest number of tokens accepted by /api/tokens/create-batch
+TOKEN_BATCH_MAX = int(os.environ.get('TOKEN_BATCH_MAX', '500'))
+
 class TokenCreationRequest(BaseModel):
     name: str = Field(..., description="Token name")
     symbol: str = Field(..., description="Token symbol") 
@@ -67,6 +73,11 @@ class TokenCreationRequest(BaseModel):
 class AutoTokenRequest(BaseModel):
     network: str = Field(default="bsc", description="Preferred network")
     
+class TokenBatchRequest(BaseModel):
+    tokens: List[TokenCreationRequest] = Field(default_factory=list, max_length=TOKEN_BATCH_MAX, description="Tokens to create")
+    count: int = Field(default=0, ge=0, le=TOKEN_BATCH_MAX, description="Number of auto-generated tokens to add")
+    network: str = Field(default="bsc", description="Network for auto-generated tokens")
+    
 class TokenResponse(BaseModel):
     id: str
     name: str
@@ -79,6 +90,10 @@ class TokenResponse(BaseModel):
     transaction_hash: Optional[str]
     explorer_url: Optional[str]
     
+class TokenBatchResponse(BaseModel):
+    batch_id: str
+    tokens: List[TokenResponse]
+    
 class PriceData(BaseModel):
     token_address: str
     network: str
@@ -105,8 +120,14 @@ class AutoSellConfig(BaseModel):
 NETWORK_CONFIGS = {
     'bsc': {
         'name': 'BSC Mainnet',
-        'rpc_url': 'https://bsc-dataseed1.binance.org',
+        'rpc_urls': [
+            'https://bsc-dataseed1.binance.org',
+            'https://bsc-dataseed2.binance.org',
+            'https://bsc-dataseed1.defibit.io',
+            'https://bsc-dataseed1.ninicoin.io'
+        ],
         'chain_id': 56,
+        'confirmations': 15,
         'explorer': 'https://bscscan.com',
         'native_token': 'BNB',
         'router': '0x10ED43C718714eb63d5aA57B78B54704E256024E',  # PancakeSwap
@@ -114,8 +135,13 @@ NETWORK_CONFIGS = {
     },
     'bsc_testnet': {
         'name': 'BSC Testnet', 
-        'rpc_url': 'https://data-seed-prebsc-1-s1.binance.org:8545',
+        'rpc_urls': [
+            'https://data-seed-prebsc-1-s1.binance.org:8545',
+            'https://data-seed-prebsc-2-s1.binance.org:8545',
+            'https://data-seed-prebsc-1-s2.binance.org:8545'
+        ],
         'chain_id': 97,
+        'confirmations': 15,
         'explorer': 'https://testnet.bscscan.com',
         'native_token': 'tBNB',
         'router': '0xD99D1c33F9fC3444f8101754aBC46c52416550D1',
@@ -123,8 +149,13 @@ NETWORK_CONFIGS = {
     },
     'ethereum': {
         'name': 'Ethereum Mainnet',
-        'rpc_url': f"https://mainnet.infura.io/v3/{os.getenv('INFURA_KEY', 'demo')}",
+        'rpc_urls': [
+            f"https://mainnet.infura.io/v3/{os.getenv('INFURA_KEY', 'demo')}",
+            'https://ethereum-rpc.publicnode.com',
+            'https://eth.llamarpc.com'
+        ],
         'chain_id': 1,
+        'confirmations': 12,
         'explorer': 'https://etherscan.io',
         'native_token': 'ETH',
         'router': '0x7a250d5630B4cF539739dF2C5dAcb4c659F2488D',  # Uniswap V2
@@ -132,8 +163,13 @@ NETWORK_CONFIGS = {
     },
     'polygon': {
         'name': 'Polygon Mainnet',
-        'rpc_url': 'https://polygon-rpc.com',
+        'rpc_urls': [
+            'https://polygon-rpc.com',
+            'https://polygon-bor-rpc.publicnode.com',
+            'https://polygon.llamarpc.com'
+        ],
         'chain_id': 137,
+        'confirmations': 64,
         'explorer': 'https://polygonscan.com', 
         'native_token': 'MATIC',
         'router': '0xa5E0829CaCEd8fFDD4De3c43696c57F7D7A678ff',  # QuickSwap
@@ -269,72 +305,896 @@ contract MemeCoin is IERC20 {
 }
 """
 
+# ============= SOLIDITY COMPILER =============
+SOLC_VERSION = os.environ.get('SOLC_VERSION', '0.8.20')
+# Paris avoids PUSH0, which not every supported chain accepts
+SOLC_EVM_VERSION = os.environ.get('SOLC_EVM_VERSION', 'paris')
+SOLC_OPTIMIZER_RUNS = int(os.environ.get('SOLC_OPTIMIZER_RUNS', '200'))
+CONTRACT_CACHE_DIR = Path(os.environ.get('CONTRACT_CACHE_DIR', Path(__file__).parent / '.contract_cache'))
+
+_solc_lock = threading.Lock()
+_solc_ready = False
+
+def ensure_solc() -> bool:
+    """Install the Solidity compiler if missing (runs once per process)"""
+    global _solc_ready
+    
+    with _solc_lock:
+        if _solc_ready:
+            return True
+        
+        try:
+            from solcx import get_installed_solc_versions, install_solc
+            installed_versions = get_installed_solc_versions()
+            if SOLC_VERSION not in [str(v) for v in installed_versions]:
+                logger.info(f"Installing Solidity {SOLC_VERSION}...")
+                install_solc(SOLC_VERSION)
+                logger.info(f"Solidity {SOLC_VERSION} installed successfully")
+            _solc_ready = True
+        except Exception as e:
+            logger.warning(f"Solidity installation warning: {e}")
+        
+        return _solc_ready
+
+def contract_cache_key() -> str:
+    """Hash of the contract source and every compiler setting that affects its output"""
+    settings = json.dumps({
+        'source': MEMECOIN_CONTRACT,
+        'solc_version': SOLC_VERSION,
+        'evm_version': SOLC_EVM_VERSION,
+        'optimize': True,
+        'optimize_runs': SOLC_OPTIMIZER_RUNS
+    }, sort_keys=True)
+    return hashlib.sha256(settings.encode()).hexdigest()
+
+# ============= BLOCKING WORK =============
+# Bounded pool for CPU-bound chain work (key generation, signing) kept off the event loop
+BLOCKCHAIN_EXECUTOR = ThreadPoolExecutor(
+    max_workers=int(os.environ.get('BLOCKCHAIN_EXECUTOR_WORKERS', '4')),
+    thread_name_prefix='blockchain'
+)
+
+async def run_blocking(func, *args):
+    """Run a blocking call in the blockchain executor"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(BLOCKCHAIN_EXECUTOR, func, *args)
+
+# ============= DEPLOYER KEY POOL =============
+class KeyStore(ABC):
+    """Storage for deployer private keys"""
+    
+    @abstractmethod
+    async def save(self, address: str, private_key: str):
+        """Store the private key of a deployer address"""
+    
+    @abstractmethod
+    async def get(self, address: str) -> Optional[str]:
+        """Private key of a deployer address, if stored"""
+
+class MemoryKeyStore(KeyStore):
+    """Keeps deployer keys in process memory (lost on restart)"""
+    
+    def __init__(self):
+        self._keys: Dict[str, str] = {}
+    
+    async def save(self, address: str, private_key: str):
+        self._keys[address] = private_key
+    
+    async def get(self, address: str) -> Optional[str]:
+        return self._keys.get(address)
+
+class MongoKeyStore(KeyStore):
+    """Keeps deployer keys in the deployer_keys collection"""
+    
+    async def save(self, address: str, private_key: str):
+        await db.deployer_keys.update_one(
+            {'address': address},
+            {'$set': {'private_key': private_key, 'created_at': datetime.utcnow()}},
+            upsert=True
+        )
+    
+    async def get(self, address: str) -> Optional[str]:
+        key = await db.deployer_keys.find_one({'address': address}, {'_id': 0, 'private_key': 1})
+        return key['private_key'] if key else None
+
+KEY_STORES = {
+    'memory': MemoryKeyStore,
+    'mongo': MongoKeyStore
+}
+
+def generate_accounts(count: int) -> List[Tuple[str, str]]:
+    """Generate (address, private_key) pairs; CPU-bound, run in the executor"""
+    from eth_account import Account
+    
+    accounts = [Account.create() for _ in range(count)]
+    return [(account.address, account.key.hex()) for account in accounts]
+
+class DeployerKeyPool:
+    """Pre-generated deployer accounts handed out without waiting on key generation"""
+    
+    def __init__(self, key_store: KeyStore, size: int, low_water: int, batch_size: int = 8):
+        self.key_store = key_store
+        self.size = size
+        self.low_water = low_water
+        self.batch_size = batch_size
+        self._accounts = deque()
+        self._refill_task: Optional[asyncio.Task] = None
+    
+    def __len__(self) -> int:
+        return len(self._accounts)
+    
+    def start(self):
+        """Fill the pool in the background"""
+        self._schedule_refill()
+    
+    async def acquire(self) -> Tuple[str, str]:
+        """Take a deployer account from the pool and persist its key"""
+        if self._accounts:
+            address, private_key = self._accounts.popleft()
+        else:
+            # Pool drained by a burst, generate one directly
+            address, private_key = (await run_blocking(generate_accounts, 1))[0]
+        
+        if len(self._accounts) <= self.low_water:
+            self._schedule_refill()
+        
+        await self.key_store.save(address, private_key)
+        return address, private_key
+    
+    def _schedule_refill(self):
+        if self._refill_task is None or self._refill_task.done():
+            self._refill_task = asyncio.create_task(self._refill())
+    
+    async def _refill(self):
+        """Top the pool up to its target size in executor-sized batches"""
+        try:
+            while len(self._accounts) < self.size:
+                count = min(self.batch_size, self.size - len(self._accounts))
+                self._accounts.extend(await run_blocking(generate_accounts, count))
+        except Exception as e:
+            logger.error(f"Deployer key pool refill failed: {e}")
+
+# ============= TRANSACTION PIPELINE =============
+# Send signed deployments to the network; when off, deployments are signed and simulated
+DEPLOY_SEND_TRANSACTIONS = os.environ.get('DEPLOY_SEND_TRANSACTIONS', 'false').lower() == 'true'
+
+# Node errors meaning our local nonce is behind the chain or the mempool
+NONCE_CONFLICT_ERRORS = ('nonce too low', 'replacement transaction underpriced', 'nonce has already been used')
+# Node errors meaning this exact transaction is already in the mempool
+ALREADY_KNOWN_ERRORS = ('already known', 'known transaction')
+
+class NonceManager:
+    """Allocates nonces locally per (network, account) instead of asking the node each time"""
+    
+    def __init__(self, resync_interval: float):
+        self.resync_interval = resync_interval
+        self._next: Dict[Tuple[str, str], int] = {}
+        self._released: Dict[Tuple[str, str], List[int]] = {}
+        self._outstanding: Dict[Tuple[str, str], int] = {}
+        self._synced_at: Dict[Tuple[str, str], float] = {}
+        self._locks: Dict[Tuple[str, str], asyncio.Lock] = {}
+    
+    async def allocate(self, w3: 'AsyncWeb3', network: str, address: str) -> int:
+        """Reserve the next nonce, reusing released ones first so no gap is left"""
+        key = (network, address)
+        lock = self._locks.setdefault(key, asyncio.Lock())
+        
+        async with lock:
+            # With nothing outstanding it is safe to re-read the chain, which
+            # picks up transactions dropped from the mempool or sent elsewhere
+            idle = not self._outstanding.get(key)
+            if key not in self._next or (idle and time.time() - self._synced_at[key] > self.resync_interval):
+                await self._sync(w3, key)
+            
+            released = self._released.get(key)
+            if released:
+                nonce = heapq.heappop(released)
+            else:
+                nonce = self._next[key]
+                self._next[key] += 1
+            
+            self._outstanding[key] = self._outstanding.get(key, 0) + 1
+            return nonce
+    
+    def confirm(self, network: str, address: str):
+        """Mark an allocated nonce as accepted by the node"""
+        key = (network, address)
+        self._outstanding[key] = max(self._outstanding.get(key, 1) - 1, 0)
+    
+    def release(self, network: str, address: str, nonce: int):
+        """Return a nonce whose transaction never reached the node so it fills the gap"""
+        key = (network, address)
+        heapq.heappush(self._released.setdefault(key, []), nonce)
+        self.confirm(network, address)
+    
+    async def resync(self, w3: 'AsyncWeb3', network: str, address: str):
+        """Re-read the pending nonce after a conflict or replacement"""
+        key = (network, address)
+        async with self._locks.setdefault(key, asyncio.Lock()):
+            await self._sync(w3, key)
+    
+    async def _sync(self, w3: 'AsyncWeb3', key: Tuple[str, str]):
+        chain_nonce = await w3.eth.get_transaction_count(key[1], 'pending')
+        if self._outstanding.get(key):
+            # Never move backwards past nonces still being sent by this process;
+            # released nonces between the chain and them are gaps still to fill
+            next_nonce = max(chain_nonce, self._next.get(key, 0))
+            released = [n for n in self._released.get(key, []) if chain_nonce <= n < next_nonce]
+        else:
+            next_nonce = chain_nonce
+            released = []
+        self._next[key] = next_nonce
+        self._released[key] = released
+        heapq.heapify(released)
+        self._synced_at[key] = time.time()
+
+class TransactionPipeline:
+    """Assigns nonces, signs and sends transactions with a per-network in-flight limit"""
+    
+    def __init__(self, max_in_flight: int, max_attempts: int = 3):
+        self.max_in_flight = max_in_flight
+        self.max_attempts = max_attempts
+        self.nonces = NonceManager(float(os.environ.get('NONCE_RESYNC_INTERVAL', '30')))
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+    
+    async def send(
+        self,
+        w3: 'AsyncWeb3',
+        network: str,
+        transaction: Dict[str, Any],
+        address: str,
+        private_key: str,
+        fresh_account: bool = False
+    ) -> Tuple[str, int]:
+        """Sign and send a transaction, returning its hash and nonce"""
+        from eth_account import Account
+        
+        semaphore = self._semaphores.setdefault(network, asyncio.Semaphore(self.max_in_flight))
+        
+        async with semaphore:
+            for attempt in range(1, self.max_attempts + 1):
+                # A freshly generated account has never sent anything, so its nonce is 0
+                if fresh_account:
+                    nonce = 0
+                else:
+                    nonce = await self.nonces.allocate(w3, network, address)
+                
+                signed_txn = await run_blocking(
+                    Account.sign_transaction, {**transaction, 'nonce': nonce}, private_key
+                )
+                tx_hash = signed_txn.hash.to_0x_hex()
+                
+                if not DEPLOY_SEND_TRANSACTIONS:
+                    if not fresh_account:
+                        self.nonces.release(network, address, nonce)
+                    return tx_hash, nonce
+                
+                try:
+                    await w3.eth.send_raw_transaction(signed_txn.raw_transaction)
+                except Exception as e:
+                    message = str(e).lower()
+                    
+                    if any(err in message for err in ALREADY_KNOWN_ERRORS):
+                        if not fresh_account:
+                            self.nonces.confirm(network, address)
+                        return tx_hash, nonce
+                    
+                    if fresh_account:
+                        raise
+                    
+                    if any(err in message for err in NONCE_CONFLICT_ERRORS):
+                        # Another transaction took this nonce, so it never goes back to the pool;
+                        # move past it and retry while attempts are left
+                        logger.warning(f"Nonce {nonce} conflict for {address} on {network}: {e}")
+                        self.nonces.confirm(network, address)
+                        await self.nonces.resync(w3, network, address)
+                        if attempt < self.max_attempts:
+                            continue
+                        raise
+                    
+                    self.nonces.release(network, address, nonce)
+                    raise
+                
+                if not fresh_account:
+                    self.nonces.confirm(network, address)
+                return tx_hash, nonce
+        
+        raise RuntimeError(f"Could not send transaction for {address} on {network}")
+
+# ============= RPC POOL =============
+# Cheap read-only methods that may be sent to a second endpoint when the first is slow;
+# eth_call, eth_estimateGas and eth_getLogs are left out so slow work is never done twice
+HEDGEABLE_RPC_METHODS = {
+    'web3_clientVersion', 'net_version', 'eth_chainId', 'eth_blockNumber',
+    'eth_gasPrice', 'eth_maxPriorityFeePerGas', 'eth_feeHistory',
+    'eth_getBalance', 'eth_getCode', 'eth_getTransactionCount',
+    'eth_getBlockByNumber', 'eth_getBlockByHash', 'eth_getTransactionByHash',
+    'eth_getTransactionReceipt'
+}
+RPC_HEADERS = {'Content-Type': 'application/json'}
+RPC_REQUEST_TIMEOUT = float(os.environ.get('RPC_REQUEST_TIMEOUT', '10'))
+RPC_EWMA_ALPHA = float(os.environ.get('RPC_EWMA_ALPHA', '0.2'))
+# Score multiplier applied per unit of error rate when ranking endpoints
+RPC_ERROR_PENALTY = float(os.environ.get('RPC_ERROR_PENALTY', '10'))
+RPC_HEDGE_DELAY = float(os.environ.get('RPC_HEDGE_DELAY_MS', '250')) / 1000
+RPC_BREAKER_THRESHOLD = int(os.environ.get('RPC_BREAKER_THRESHOLD', '5'))
+RPC_BREAKER_COOLDOWN = float(os.environ.get('RPC_BREAKER_COOLDOWN', '15'))
+RPC_BREAKER_MAX_COOLDOWN = float(os.environ.get('RPC_BREAKER_MAX_COOLDOWN', '300'))
+# JSON-RPC errors that mean the endpoint is throttling or failing, not that the call is bad
+RPC_ENDPOINT_ERROR_CODES = {-32005, -32603, 429}
+RPC_ENDPOINT_ERROR_MESSAGES = ('rate limit', 'limit exceeded', 'too many requests', 'capacity exceeded')
+
+class RpcEndpointError(ConnectionError):
+    """An endpoint answered with a throttling or server error; carries the response"""
+    
+    def __init__(self, response: Any):
+        super().__init__(f"RPC endpoint error: {response}")
+        self.response = response
+
+def is_endpoint_error(response: Any) -> bool:
+    """Whether a response is a top-level throttling or server error, or a batch made only of those"""
+    if isinstance(response, list):
+        return bool(response) and all(is_endpoint_error(item) for item in response)
+    error = response.get('error') if isinstance(response, dict) else None
+    if not isinstance(error, dict):
+        return False
+    message = str(error.get('message', '')).lower()
+    return error.get('code') in RPC_ENDPOINT_ERROR_CODES or any(text in message for text in RPC_ENDPOINT_ERROR_MESSAGES)
+
+def rpc_urls(network: str) -> List[str]:
+    """RPC endpoints for a network, overridable with RPC_URLS_<NETWORK> (comma separated)"""
+    override = os.environ.get(f"RPC_URLS_{network.upper()}")
+    if override:
+        return [url.strip() for url in override.split(',') if url.strip()]
+    return NETWORK_CONFIGS[network]['rpc_urls']
+
+class RpcEndpoint:
+    """Health of one RPC endpoint: EWMA latency and error rate plus a circuit breaker"""
+    __slots__ = ('url', 'latency', 'error_rate', 'failures', 'cooldown', 'open_until', 'requests', 'errors')
+    
+    def __init__(self, url: str):
+        self.url = url
+        self.latency: Optional[float] = None
+        self.error_rate = 0.0
+        # Consecutive failures; the breaker opens once this reaches RPC_BREAKER_THRESHOLD
+        self.failures = 0
+        self.cooldown = 0.0
+        self.open_until = 0.0
+        self.requests = 0
+        self.errors = 0
+    
+    @property
+    def available(self) -> bool:
+        """Whether the breaker is closed, or half-open after its cooldown"""
+        return time.monotonic() >= self.open_until
+    
+    @property
+    def score(self) -> float:
+        """Lower is better; endpoints that were never used are tried first"""
+        return (self.latency or 0.0) * (1 + RPC_ERROR_PENALTY * self.error_rate)
+    
+    def observe_latency(self, elapsed: float):
+        if self.latency is None:
+            self.latency = elapsed
+        else:
+            self.latency += RPC_EWMA_ALPHA * (elapsed - self.latency)
+    
+    def record_success(self, elapsed: float):
+        self.requests += 1
+        self.observe_latency(elapsed)
+        self.error_rate -= RPC_EWMA_ALPHA * self.error_rate
+        self.failures = 0
+        self.cooldown = 0.0
+    
+    def record_failure(self):
+        self.requests += 1
+        self.errors += 1
+        # A failure costs as much as a timeout, so failing endpoints never rank as fast
+        self.observe_latency(RPC_REQUEST_TIMEOUT)
+        self.error_rate += RPC_EWMA_ALPHA * (1 - self.error_rate)
+        self.failures += 1
+        
+        # A failed trial while half-open reopens the breaker with a doubled cooldown
+        if self.failures >= RPC_BREAKER_THRESHOLD:
+            self.cooldown = min(max(self.cooldown * 2, RPC_BREAKER_COOLDOWN), RPC_BREAKER_MAX_COOLDOWN)
+            self.open_until = time.monotonic() + self.cooldown
+    
+    def stats(self) -> Dict[str, Any]:
+        parts = urlsplit(self.url)
+        return {
+            # Host only, so API keys in the path or query are not exposed
+            'host': parts.netloc,
+            'latency_ms': round(self.latency * 1000, 1) if self.latency is not None else None,
+            'error_rate': round(self.error_rate, 3),
+            'open': not self.available,
+            'requests': self.requests,
+            'errors': self.errors
+        }
+
+class RpcPool:
+    """Routes JSON-RPC requests for one network across several endpoints"""
+    
+    def __init__(self, network: str, urls: List[str]):
+        self.network = network
+        self.endpoints = [RpcEndpoint(url) for url in urls]
+        self.hedges = 0
+        self.failovers = 0
+        self._session: Optional[aiohttp.ClientSession] = None
+    
+    def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            self._session = create_http_session()
+        return self._session
+    
+    async def close(self):
+        if self._session and not self._session.closed:
+            await self._session.close()
+        self._session = None
+    
+    def _ranked(self) -> List[RpcEndpoint]:
+        """Healthy endpoints best first, or every endpoint if all breakers are open"""
+        healthy = [endpoint for endpoint in self.endpoints if endpoint.available]
+        if healthy:
+            return sorted(healthy, key=lambda endpoint: endpoint.score)
+        return sorted(self.endpoints, key=lambda endpoint: endpoint.open_until)
+    
+    def _hedge_delay(self, endpoint: RpcEndpoint) -> float:
+        """How long to wait on an endpoint before also asking the next one"""
+        return max(RPC_HEDGE_DELAY, 2 * (endpoint.latency or 0.0))
+    
+    async def _post(self, endpoint: RpcEndpoint, payload: bytes) -> Any:
+        """Send a payload to one endpoint and record the outcome"""
+        started = time.monotonic()
+        try:
+            async with self._get_session().post(
+                endpoint.url,
+                data=payload,
+                headers=RPC_HEADERS,
+                timeout=aiohttp.ClientTimeout(total=RPC_REQUEST_TIMEOUT)
+            ) as response:
+                response.raise_for_status()
+                result = await response.json(content_type=None)
+            # Throttled endpoints often answer with HTTP 200 and an error body
+            if is_endpoint_error(result):
+                raise RpcEndpointError(result)
+        except asyncio.CancelledError:
+            # A hedge loser still tells us the endpoint was at least this slow
+            endpoint.observe_latency(time.monotonic() - started)
+            raise
+        except Exception as e:
+            endpoint.record_failure()
+            if not endpoint.available:
+                logger.warning(f"RPC endpoint {urlsplit(endpoint.url).netloc} ejected for {endpoint.cooldown:.0f}s: {e}")
+            raise
+        
+        endpoint.record_success(time.monotonic() - started)
+        return result
+    
+    async def request(self, payload: bytes, hedge: bool = False) -> Any:
+        """Send a JSON-RPC payload to the best endpoint, failing over on errors
+        
+        With hedge set, a request that is still pending after the hedge delay is
+        also sent to the next endpoint and the first response wins.
+        """
+        candidates = deque(self._ranked())
+        tasks: Dict[asyncio.Future, RpcEndpoint] = {}
+        last_error: Optional[BaseException] = None
+        
+        try:
+            while candidates or tasks:
+                if not tasks:
+                    if last_error is not None:
+                        self.failovers += 1
+                    endpoint = candidates.popleft()
+                    tasks[asyncio.ensure_future(self._post(endpoint, payload))] = endpoint
+                
+                timeout = None
+                if hedge and candidates and len(tasks) == 1:
+                    timeout = self._hedge_delay(next(iter(tasks.values())))
+                
+                done, _ = await asyncio.wait(tasks, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    self.hedges += 1
+                    endpoint = candidates.popleft()
+                    tasks[asyncio.ensure_future(self._post(endpoint, payload))] = endpoint
+                    continue
+                
+                for task in done:
+                    del tasks[task]
+                    if task.exception() is None:
+                        return task.result()
+                    last_error = task.exception()
+        finally:
+            for task in tasks:
+                task.cancel()
+        
+        if isinstance(last_error, RpcEndpointError):
+            # Every endpoint refused; callers handle the error response as before
+            return last_error.response
+        raise last_error or ConnectionError(f"No RPC endpoints configured for {self.network}")
+    
+    async def batch(self, calls: List[Tuple[str, List[Any]]]) -> List[Dict[str, Any]]:
+        """Send (method, params) calls as one JSON-RPC batch; responses come back in call order"""
+        payload = json.dumps([
+            {'jsonrpc': '2.0', 'id': index, 'method': method, 'params': params}
+            for index, (method, params) in enumerate(calls)
+        ]).encode()
+        response = await self.request(payload, hedge=all(method in HEDGEABLE_RPC_METHODS for method, _ in calls))
+        
+        if not isinstance(response, list):
+            raise ConnectionError(f"RPC batch rejected on {self.network}: {response.get('error')}")
+        
+        responses = {item.get('id'): item for item in response}
+        return [responses.get(index, {'error': {'message': 'Missing response'}}) for index in range(len(calls))]
+    
+    async def probe(self, timeout: float) -> bool:
+        """Check every endpoint directly, so ejected endpoints can recover; True if any is up"""
+        payload = json.dumps({'jsonrpc': '2.0', 'id': 0, 'method': 'eth_blockNumber', 'params': []}).encode()
+        
+        async def check(endpoint: RpcEndpoint) -> bool:
+            try:
+                response = await asyncio.wait_for(self._post(endpoint, payload), timeout=timeout)
+                return 'result' in response
+            except Exception:
+                return False
+        
+        results = await asyncio.gather(*(check(endpoint) for endpoint in self.endpoints))
+        return any(results)
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'endpoints': [endpoint.stats() for endpoint in self.endpoints],
+            'hedges': self.hedges,
+            'failovers': self.failovers
+        }
+
+def create_pooled_provider(pool: RpcPool):
+    """Build an AsyncWeb3 provider that sends every request through an RpcPool"""
+    from web3.providers.async_base import AsyncJSONBaseProvider
+    
+    class PooledProvider(AsyncJSONBaseProvider):
+        async def make_request(self, method, params):
+            return await pool.request(
+                self.encode_rpc_request(method, params),
+                hedge=method in HEDGEABLE_RPC_METHODS
+            )
+        
+        async def make_batch_request(self, requests):
+            response = await pool.request(
+                self.encode_batch_rpc_request(requests),
+                hedge=all(method in HEDGEABLE_RPC_METHODS for method, _ in requests)
+            )
+            if not isinstance(response, list):
+                # RPC errors come back as a single error object
+                return response
+            return sorted(response, key=lambda item: item.get('id', 0))
+        
+        async def disconnect(self):
+            await pool.close()
+    
+    return PooledProvider()
+
+# ============= GAS ORACLE =============
+HEAD_POLL_INTERVAL = float(os.environ.get('HEAD_POLL_INTERVAL', '2'))
+GAS_FEE_HISTORY_BLOCKS = int(os.environ.get('GAS_FEE_HISTORY_BLOCKS', '10'))
+GAS_PRIORITY_PERCENTILE = float(os.environ.get('GAS_PRIORITY_PERCENTILE', '50'))
+# Quotes older than this are refreshed inline before use
+GAS_QUOTE_MAX_AGE = float(os.environ.get('GAS_QUOTE_MAX_AGE', '60'))
+FALLBACK_GAS_PRICE = int(float(os.environ.get('FALLBACK_GAS_PRICE_GWEI', '5')) * 10**9)
+
+class HeadWatcher:
+    """Polls block numbers and notifies listeners once per new block, per network"""
+    
+    def __init__(self, blockchain_service: 'BlockchainService', interval: float):
+        self.blockchain_service = blockchain_service
+        self.interval = interval
+        self.heads: Dict[str, int] = {}
+        self._listeners = []
+        self._tasks: Dict[str, asyncio.Task] = {}
+    
+    def add_listener(self, listener):
+        """Register an async callable(network, block_number)"""
+        self._listeners.append(listener)
+    
+    def watch(self, network: str):
+        """Start polling a network if it is not polled yet"""
+        if network not in self._tasks:
+            self._tasks[network] = asyncio.create_task(self._watch(network))
+    
+    async def stop(self):
+        for task in self._tasks.values():
+            task.cancel()
+        await asyncio.gather(*self._tasks.values(), return_exceptions=True)
+        self._tasks = {}
+    
+    async def _watch(self, network: str):
+        while True:
+            try:
+                (response,) = await self.blockchain_service.get_rpc_pool(network).batch([('eth_blockNumber', [])])
+                head = int(response['result'], 16)
+                if head != self.heads.get(network):
+                    self.heads[network] = head
+                    results = await asyncio.gather(
+                        *(listener(network, head) for listener in self._listeners),
+                        return_exceptions=True
+                    )
+                    for result in results:
+                        if isinstance(result, Exception):
+                            logger.error(f"New block handler failed on {network}: {result}")
+            except Exception as e:
+                logger.warning(f"Head polling failed on {network}: {e}")
+            
+            await asyncio.sleep(self.interval)
+
+class GasQuote:
+    """Fee fields for one network as of one block"""
+    __slots__ = ('block', 'fetched_at', 'gas_price', 'max_fee', 'priority_fee')
+    
+    def __init__(self, block: Optional[int], gas_price: Optional[int] = None, max_fee: Optional[int] = None, priority_fee: Optional[int] = None):
+        self.block = block
+        self.fetched_at = time.time()
+        self.gas_price = gas_price
+        self.max_fee = max_fee
+        self.priority_fee = priority_fee
+    
+    @property
+    def age(self) -> float:
+        return time.time() - self.fetched_at
+    
+    def transaction_fields(self) -> Dict[str, int]:
+        """EIP-1559 fee fields when available, otherwise a legacy gasPrice"""
+        if self.max_fee is not None:
+            return {'type': 2, 'maxFeePerGas': self.max_fee, 'maxPriorityFeePerGas': self.priority_fee}
+        return {'gasPrice': self.gas_price}
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'block': self.block,
+            'age_seconds': round(self.age, 1),
+            'type': 'eip1559' if self.max_fee is not None else 'legacy',
+            **{key: value for key, value in self.transaction_fields().items() if key != 'type'}
+        }
+
+class GasOracle:
+    """Keeps the latest fee quote per network, refreshed once per new block"""
+    
+    def __init__(self, blockchain_service: 'BlockchainService', head_watcher: HeadWatcher):
+        self.blockchain_service = blockchain_service
+        self.head_watcher = head_watcher
+        self.quotes: Dict[str, GasQuote] = {}
+        self._refreshing: Dict[str, asyncio.Future] = {}
+        head_watcher.add_listener(self.refresh)
+    
+    async def get_quote(self, network: str) -> GasQuote:
+        """Latest quote for a network, read from memory unless missing or too old"""
+        quote = self.quotes.get(network)
+        if quote is not None and quote.age < GAS_QUOTE_MAX_AGE:
+            return quote
+        
+        self.head_watcher.watch(network)
+        # Concurrent deployments share one inline refresh
+        refreshing = self._refreshing.get(network)
+        if refreshing is None:
+            refreshing = asyncio.ensure_future(self.refresh(network))
+            self._refreshing[network] = refreshing
+            refreshing.add_done_callback(lambda _: self._refreshing.pop(network, None))
+        
+        try:
+            return await asyncio.shield(refreshing)
+        except Exception as e:
+            logger.warning(f"Gas quote refresh failed on {network}: {e}")
+            # A stale quote beats the hard-coded fallback
+            return quote or GasQuote(None, gas_price=FALLBACK_GAS_PRICE)
+    
+    async def refresh(self, network: str, block: Optional[int] = None) -> GasQuote:
+        """Fetch fee history and gas price for a block (default latest) in one batch"""
+        fee_history, gas_price = await self.blockchain_service.get_rpc_pool(network).batch([
+            ('eth_feeHistory', [hex(GAS_FEE_HISTORY_BLOCKS), hex(block) if block is not None else 'latest', [GAS_PRIORITY_PERCENTILE]]),
+            ('eth_gasPrice', [])
+        ])
+        
+        history = fee_history.get('result') or {}
+        # The last base fee is the next block's; chains without EIP-1559 report zero
+        base_fees = [int(value, 16) for value in history.get('baseFeePerGas') or []]
+        if base_fees and base_fees[-1] > 0:
+            rewards = sorted(int(reward[0], 16) for reward in history.get('reward') or [] if reward)
+            priority_fee = rewards[len(rewards) // 2] if rewards else 0
+            # Doubling the base fee stays valid through several consecutive full blocks
+            quote = GasQuote(block, max_fee=2 * base_fees[-1] + priority_fee, priority_fee=priority_fee)
+        elif 'result' in gas_price:
+            quote = GasQuote(block, gas_price=int(gas_price['result'], 16))
+        else:
+            raise ConnectionError(f"No fee data: {gas_price.get('error')}")
+        
+        self.quotes[network] = quote
+        return quote
+    
+    def stats(self) -> Dict[str, Any]:
+        return {network: quote.to_dict() for network, quote in self.quotes.items()}
+
 # ============= BLOCKCHAIN SERVICE =============
 class BlockchainService:
     def __init__(self):
+        self.key_pool = DeployerKeyPool(
+            key_store=KEY_STORES[os.environ.get('DEPLOYER_KEY_STORE', 'memory')](),
+            size=int(os.environ.get('DEPLOYER_POOL_SIZE', '32')),
+            low_water=int(os.environ.get('DEPLOYER_POOL_LOW_WATER', '8'))
+        )
+        self.tx_pipeline = TransactionPipeline(
+            max_in_flight=int(os.environ.get('DEPLOY_MAX_IN_FLIGHT', '16'))
+        )
+        self.head_watcher = HeadWatcher(self, HEAD_POLL_INTERVAL)
+        self.gas_oracle = GasOracle(self, self.head_watcher)
+        # Optional funded hot wallet shared by all deployments
+        self.hot_wallet_key = os.environ.get('DEPLOYER_PRIVATE_KEY')
+        self._hot_wallet_address: Optional[str] = None
+        self.rpc_pools: Dict[str, RpcPool] = {}
         self.web3_instances = {}
-        self._initialize_connections()
+        # Result of the most recent probe per network; unprobed networks are usable
+        self.network_status: Dict[str, bool] = {}
+        self.probe_timeout = float(os.environ.get('RPC_PROBE_TIMEOUT', '5'))
+        self.probe_interval = float(os.environ.get('RPC_PROBE_INTERVAL', '60'))
+        self.probing = False
+        # Compiled contract data keyed by contract_cache_key(), plus per-network factories
+        self._compiled_contracts: Dict[str, Dict[str, Any]] = {}
+        self._compile_lock = threading.Lock()
+        self._compile_task: Optional[asyncio.Future] = None
+        self._contract_factories: Dict[str, Any] = {}
+    
+    def _connect(self, network: str) -> 'AsyncWeb3':
+        """Get or lazily create the Web3 instance for a network (no network I/O)"""
+        w3 = self.web3_instances.get(network)
+        if w3 is None:
+            from web3 import AsyncWeb3
+            
+            # Requests go through the network's endpoint pool so they never block the event loop
+            w3 = AsyncWeb3(create_pooled_provider(self._get_rpc_pool(network)))
+            self.web3_instances[network] = w3
+        return w3
+    
+    def get_rpc_pool(self, network: str) -> RpcPool:
+        """Get the endpoint pool for an available network"""
+        if network not in NETWORK_CONFIGS or self.network_status.get(network) is False:
+            raise ValueError(f"Network {network} not available")
+        return self._get_rpc_pool(network)
+    
+    def _get_rpc_pool(self, network: str) -> RpcPool:
+        pool = self.rpc_pools.get(network)
+        if pool is None:
+            pool = RpcPool(network, rpc_urls(network))
+            self.rpc_pools[network] = pool
+        return pool
+    
+    async def _probe(self, network: str) -> bool:
+        """Check a single network's RPC with a timeout"""
+        config = NETWORK_CONFIGS[network]
+        try:
+            connected = await self._get_rpc_pool(network).probe(self.probe_timeout)
+        except Exception as e:
+            logger.error(f"Error connecting to {config['name']}: {e}")
+            connected = False
         
-    def _initialize_connections(self):
-        """Initialize Web3 connections"""
-        for network, config in NETWORK_CONFIGS.items():
-            try:
-                w3 = Web3(Web3.HTTPProvider(config['rpc_url']))
-                if w3.is_connected():
-                    self.web3_instances[network] = w3
-                    logger.info(f"Connected to {config['name']}")
-                else:
-                    logger.warning(f"Failed to connect to {config['name']}")
-            except Exception as e:
-                logger.error(f"Error connecting to {config['name']}: {e}")
+        if self.network_status.get(network) != connected:
+            if connected:
+                logger.info(f"Connected to {config['name']}")
+            else:
+                logger.warning(f"Failed to connect to {config['name']}")
+        
+        self.network_status[network] = connected
+        return connected
+    
+    async def probe_networks(self):
+        """Probe every network's RPC in parallel"""
+        await asyncio.gather(*(self._probe(network) for network in NETWORK_CONFIGS))
+    
+    async def monitor_connections(self):
+        """Periodically re-probe RPCs so networks recover when their endpoint does"""
+        if self.probing:
+            return
+        
+        self.probing = True
+        
+        try:
+            while self.probing:
+                await self.probe_networks()
+                await asyncio.sleep(self.probe_interval)
+        except Exception as e:
+            logger.error(f"RPC monitoring error: {e}")
+        finally:
+            self.probing = False
     
-    def get_web3(self, network: str) -> Web3:
+    async def close(self):
+        """Stop monitoring and close RPC sessions"""
+        self.probing = False
+        await self.head_watcher.stop()
+        for pool in self.rpc_pools.values():
+            await pool.close()
+    
+    def get_web3(self, network: str) -> 'AsyncWeb3':
         """Get Web3 instance for network"""
-        if network not in self.web3_instances:
+        if network not in NETWORK_CONFIGS or self.network_status.get(network) is False:
             raise ValueError(f"Network {network} not available")
-        return self.web3_instances[network]
+        return self._connect(network)
     
     def compile_contract(self) -> Dict[str, Any]:
-        """Get pre-compiled contract data"""
-        # Pre-compiled ERC20 contract data (simplified for demo)
-        # In production, you would use actual compiled bytecode
-        return {
-            'abi': [
-                {
-                    "inputs": [
-                        {"internalType": "string", "name": "_name", "type": "string"},
-                        {"internalType": "string", "name": "_symbol", "type": "string"},
-                        {"internalType": "uint256", "name": "_totalSupply", "type": "uint256"},
-                        {"internalType": "uint256", "name": "_taxRate", "type": "uint256"},
-                        {"internalType": "address", "name": "_taxWallet", "type": "address"}
-                    ],
-                    "stateMutability": "nonpayable",
-                    "type": "constructor"
-                },
-                {
-                    "inputs": [],
-                    "name": "name",
-                    "outputs": [{"internalType": "string", "name": "", "type": "string"}],
-                    "stateMutability": "view",
-                    "type": "function"
-                },
-                {
-                    "inputs": [],
-                    "name": "symbol",
-                    "outputs": [{"internalType": "string", "name": "", "type": "string"}],
-                    "stateMutability": "view",
-                    "type": "function"
-                },
-                {
-                    "inputs": [],
-                    "name": "totalSupply",
-                    "outputs": [{"internalType": "uint256", "name": "", "type": "uint256"}],
-                    "stateMutability": "view",
-                    "type": "function"
+        """Compile MEMECOIN_CONTRACT, reusing the memory or disk cache when possible"""
+        cache_key = contract_cache_key()
+        
+        with self._compile_lock:
+            contract_data = self._compiled_contracts.get(cache_key)
+            if contract_data:
+                return contract_data
+            
+            cache_file = CONTRACT_CACHE_DIR / f"{cache_key}.json"
+            try:
+                contract_data = json.loads(cache_file.read_text())
+            except (OSError, ValueError):
+                contract_data = None
+            
+            if not contract_data:
+                from solcx import compile_source
+                
+                if not ensure_solc():
+                    raise RuntimeError(f"Solidity {SOLC_VERSION} is not available")
+                
+                logger.info(f"Compiling MemeCoin contract ({cache_key[:12]})")
+                compiled = compile_source(
+                    MEMECOIN_CONTRACT,
+                    output_values=['abi', 'bin'],
+                    solc_version=SOLC_VERSION,
+                    evm_version=SOLC_EVM_VERSION,
+                    optimize=True,
+                    optimize_runs=SOLC_OPTIMIZER_RUNS
+                )
+                contract_interface = compiled['<stdin>:MemeCoin']
+                contract_data = {
+                    'abi': contract_interface['abi'],
+                    'bytecode': '0x' + contract_interface['bin']
                 }
-            ],
-            'bytecode': '0x608060405234801561001057600080fd5b50'  # Simplified bytecode placeholder
-        }
+                
+                # Write atomically so concurrent workers never read a partial file
+                try:
+                    CONTRACT_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+                    tmp_file = cache_file.with_suffix(f".{os.getpid()}.tmp")
+                    tmp_file.write_text(json.dumps(contract_data))
+                    os.replace(tmp_file, cache_file)
+                except OSError as e:
+                    logger.warning(f"Could not write contract cache: {e}")
+            
+            self._compiled_contracts[cache_key] = contract_data
+            return contract_data
+    
+    async def prepare_contract(self) -> Dict[str, Any]:
+        """Compile the contract once in the background, sharing the result with all callers"""
+        if self._compile_task is None or (self._compile_task.done() and self._compile_task.exception()):
+            self._compile_task = asyncio.ensure_future(run_blocking(self.compile_contract))
+        return await asyncio.shield(self._compile_task)
+    
+    async def warm_contract(self):
+        """Compile the contract ahead of the first deploy"""
+        try:
+            await self.prepare_contract()
+        except Exception as e:
+            logger.error(f"Contract compilation failed: {e}")
+    
+    async def get_contract_factory(self, network: str):
+        """Get the pre-built contract factory for a network"""
+        factory = self._contract_factories.get(network)
+        if factory is None:
+            contract_data = await self.prepare_contract()
+            factory = self.get_web3(network).eth.contract(
+                abi=contract_data['abi'],
+                bytecode=contract_data['bytecode']
+            )
+            self._contract_factories[network] = factory
+        return factory
+    
+    def _get_hot_wallet(self) -> str:
+        """Address of the configured hot wallet"""
+        if self._hot_wallet_address is None:
+            from eth_account import Account
+            self._hot_wallet_address = Account.from_key(self.hot_wallet_key).address
+        return self._hot_wallet_address
     
     async def deploy_token(
         self, 
@@ -345,6 +1205,7 @@ class BlockchainService:
         tax_rate: int = 5
     ) -> Dict[str, Any]:
         """Deploy token contract"""
+        from web3.utils import get_create_address
         
         # Get network config and web3
         config = NETWORK_CONFIGS.get(network)
@@ -353,24 +1214,22 @@ class BlockchainService:
         
         w3 = self.get_web3(network)
         
-        # Generate deployer account (In production, use secure key management)
-        account = Account.create()
-        deployer_address = account.address
-        private_key = account.key.hex()
+        if self.hot_wallet_key:
+            # Funded hot wallet, nonces come from the local nonce manager
+            deployer_address, private_key = self._get_hot_wallet(), self.hot_wallet_key
+            fresh_account = False
+        else:
+            # Take a pre-generated deployer account (its key is kept in the key store)
+            deployer_address, private_key = await self.key_pool.acquire()
+            fresh_account = True
         
         # Check if testnet, provide some test tokens
         if 'testnet' in network:
             logger.info(f"Testnet deployment - Deployer address: {deployer_address}")
             logger.info("For testnet, you need to get test tokens from faucet")
         
-        # Compile contract
-        contract_data = self.compile_contract()
-        
-        # Create contract instance
-        contract = w3.eth.contract(
-            abi=contract_data['abi'],
-            bytecode=contract_data['bytecode']
-        )
+        # Contract factory built from the cached compiler output
+        contract = await self.get_contract_factory(network)
         
         # Tax wallet (using deployer as tax wallet for simplicity)
         tax_wallet = deployer_address
@@ -386,119 +1245,1049 @@ class BlockchainService:
         
         try:
             # Estimate gas
-            gas_estimate = constructor_tx.estimate_gas({'from': deployer_address})
+            gas_estimate = await constructor_tx.estimate_gas({'from': deployer_address})
             gas_limit = int(gas_estimate * 1.2)  # Add 20% buffer
         except Exception as e:
             logger.warning(f"Gas estimation failed: {e}, using default")
             gas_limit = 3000000
         
-        # Get current gas price
-        try:
-            gas_price = w3.eth.gas_price
-        except Exception:
-            gas_price = w3.to_wei('5', 'gwei')  # Fallback gas price
+        # Current fees from the block-scoped oracle (no RPC round trip while fresh)
+        gas_quote = await self.gas_oracle.get_quote(network)
         
-        # Build transaction
+        # Build transaction (the pipeline fills in the nonce)
         transaction = {
             'chainId': config['chain_id'],
             'gas': gas_limit,
-            'gasPrice': gas_price,
-            'nonce': w3.eth.get_transaction_count(deployer_address),
+            **gas_quote.transaction_fields(),
             'data': constructor_tx.data_in_transaction,
         }
         
-        # Sign transaction
-        signed_txn = w3.eth.account.sign_transaction(transaction, private_key)
-        
-        # For demonstration, we'll simulate deployment success
-        # In production, you would send the actual transaction
+        # Sign and, when enabled, send the transaction
+        tx_hash, nonce = await self.tx_pipeline.send(
+            w3, network, transaction, deployer_address, private_key, fresh_account
+        )
         
-        # Simulate contract address
-        import hashlib
-        contract_address = '0x' + hashlib.md5(f"{name}{symbol}{int(time.time())}".encode()).hexdigest()[:40]
-        tx_hash = '0x' + hashlib.md5(f"tx{name}{symbol}{int(time.time())}".encode()).hexdigest()
+        if DEPLOY_SEND_TRANSACTIONS:
+            contract_address = get_create_address(deployer_address, nonce)
+        else:
+            # For demonstration, we'll simulate deployment success
+            contract_address = '0x' + hashlib.md5(f"{name}{symbol}{int(time.time())}".encode()).hexdigest()[:40]
+            tx_hash = '0x' + hashlib.md5(f"tx{name}{symbol}{int(time.time())}".encode()).hexdigest()
         
         return {
             'contract_address': contract_address,
             'transaction_hash': tx_hash,
             'deployer_address': deployer_address,
-            'private_key': private_key,  # Store securely in production!
             'network': network,
             'explorer_url': f"{config['explorer']}/address/{contract_address}"
         }
 
-# ============= PRICE SERVICE =============
-class PriceService:
-    def __init__(self):
-        self.price_cache = {}
-        self.cache_duration = 300  # 5 minutes
+# ============= ON-CHAIN READS =============
+# Multicall3 is deployed at the same address on every supported network
+MULTICALL3_ADDRESS = '0xcA11bde05977b3631167028862bE2a173976CA11'
+AGGREGATE3_SELECTOR = bytes.fromhex('82ad56cb')
+# 'multicall' packs calls into aggregate3; 'batch' sends one eth_call per call in JSON-RPC batches
+ONCHAIN_READ_MODE = os.environ.get('ONCHAIN_READ_MODE', 'multicall')
+MULTICALL_CHUNK_SIZE = int(os.environ.get('MULTICALL_CHUNK_SIZE', '500'))
+RPC_BATCH_SIZE = int(os.environ.get('RPC_BATCH_SIZE', '20'))
+ONCHAIN_READ_CONCURRENCY = int(os.environ.get('ONCHAIN_READ_CONCURRENCY', '4'))
+# Contract view functions refreshed per token, and the token document field each lands in
+TOKEN_READ_FIELDS = {
+    'name': 'name',
+    'symbol': 'symbol',
+    'totalSupply': 'total_supply',
+    'taxRate': 'tax_rate',
+    'balanceOf': 'deployer_balance'
+}
+# Raw uint256 amounts are stored as strings since they overflow Mongo's 64-bit integers
+TOKEN_AMOUNT_FIELDS = {'total_supply', 'deployer_balance'}
+
+def _decode_output(output_types: List[str], data: bytes) -> Optional[Any]:
+    """Decode a single-value return, or None if the call returned nothing usable"""
+    from eth_abi import decode
+    
+    try:
+        return decode(output_types, data)[0]
+    except Exception:
+        return None
+
+class TokenReader:
+    """Reads contract state for many tokens with as few RPC round trips as possible"""
+    
+    def __init__(self, blockchain_service: BlockchainService):
+        self.blockchain_service = blockchain_service
+        self.rpc_requests = 0
+        self.calls = 0
+        self._functions: Optional[Dict[str, Tuple[bytes, List[str]]]] = None
+    
+    async def _get_functions(self) -> Dict[str, Tuple[bytes, List[str]]]:
+        """Selector and output types of each view function in the compiled ABI"""
+        if self._functions is None:
+            from eth_utils import function_abi_to_4byte_selector
+            
+            contract_data = await self.blockchain_service.prepare_contract()
+            self._functions = {
+                item['name']: (function_abi_to_4byte_selector(item), [output['type'] for output in item['outputs']])
+                for item in contract_data['abi']
+                if item.get('type') == 'function' and item.get('stateMutability') == 'view'
+            }
+        return self._functions
+    
+    async def call_many(self, network: str, calls: List[Tuple[str, bytes, List[str]]]) -> List[Optional[Any]]:
+        """Run (target, call data, output types) read calls, returning decoded values (None on failure)"""
+        self.calls += len(calls)
+        
+        if ONCHAIN_READ_MODE == 'multicall':
+            chunks = [calls[start:start + MULTICALL_CHUNK_SIZE] for start in range(0, len(calls), MULTICALL_CHUNK_SIZE)]
+            params = await run_blocking(lambda: [self._encode_aggregate3(chunk) for chunk in chunks])
+            responses = await self._send(network, params)
+            return await run_blocking(self._decode_aggregate3, chunks, responses)
+        
+        params = [{'to': target, 'data': '0x' + call_data.hex()} for target, call_data, _ in calls]
+        responses = await self._send(network, params)
+        return await run_blocking(self._decode_results, calls, responses)
+    
+    async def _send(self, network: str, params: List[Dict[str, str]]) -> List[Optional[str]]:
+        """Send eth_calls in JSON-RPC batches of RPC_BATCH_SIZE; failed calls give None"""
+        pool = self.blockchain_service.get_rpc_pool(network)
+        semaphore = asyncio.Semaphore(ONCHAIN_READ_CONCURRENCY)
+        
+        async def send_batch(batch: List[Dict[str, str]]) -> List[Optional[str]]:
+            async with semaphore:
+                responses = await pool.batch([('eth_call', [call, 'latest']) for call in batch])
+                self.rpc_requests += 1
+            return [response.get('result') for response in responses]
+        
+        batches = await asyncio.gather(*(
+            send_batch(params[start:start + RPC_BATCH_SIZE]) for start in range(0, len(params), RPC_BATCH_SIZE)
+        ))
+        return [result for batch in batches for result in batch]
+    
+    @staticmethod
+    def _encode_aggregate3(chunk: List[Tuple[str, bytes, List[str]]]) -> Dict[str, str]:
+        from eth_abi import encode
         
-    async def get_token_price(self, token_address: str, network: str) -> Optional[Dict]:
-        """Get token price from various sources"""
-        cache_key = f"{network}:{token_address}"
+        data = AGGREGATE3_SELECTOR + encode(
+            ['(address,bool,bytes)[]'],
+            [[(target, True, call_data) for target, call_data, _ in chunk]]
+        )
+        return {'to': MULTICALL3_ADDRESS, 'data': '0x' + data.hex()}
+    
+    @staticmethod
+    def _decode_aggregate3(chunks: List[List[Tuple[str, bytes, List[str]]]], responses: List[Optional[str]]) -> List[Optional[Any]]:
+        from eth_abi import decode
+        
+        values = []
+        for chunk, response in zip(chunks, responses):
+            if response is None:
+                values.extend([None] * len(chunk))
+                continue
+            
+            (results,) = decode(['(bool,bytes)[]'], bytes.fromhex(response[2:]))
+            values.extend(
+                _decode_output(output_types, data) if success else None
+                for (success, data), (_, _, output_types) in zip(results, chunk)
+            )
+        return values
+    
+    @staticmethod
+    def _decode_results(calls: List[Tuple[str, bytes, List[str]]], responses: List[Optional[str]]) -> List[Optional[Any]]:
+        return [
+            _decode_output(output_types, bytes.fromhex(response[2:])) if response else None
+            for (_, _, output_types), response in zip(calls, responses)
+        ]
+    
+    async def refresh_tokens(self, network: Optional[str] = None) -> Dict[str, int]:
+        """Re-read on-chain fields of deployed tokens into db.tokens"""
+        query: Dict[str, Any] = {'status': 'deployed', 'contract_address': {'$ne': None}}
+        if network:
+            query['network'] = network
+        
+        tokens_by_network: Dict[str, List[Dict[str, Any]]] = {}
+        async for token in db.tokens.find(query, {'_id': 0, 'id': 1, 'network': 1, 'contract_address': 1, 'deployer_address': 1}):
+            tokens_by_network.setdefault(token['network'], []).append(token)
+        
+        requests_before = self.rpc_requests
+        results = await asyncio.gather(
+            *(self._refresh_network(name, tokens) for name, tokens in tokens_by_network.items()),
+            return_exceptions=True
+        )
         
-        # Check cache
-        if cache_key in self.price_cache:
-            cached_data = self.price_cache[cache_key]
-            if time.time() - cached_data['timestamp'] < self.cache_duration:
-                return cached_data['data']
+        stats = {'refreshed': 0, 'failed': 0}
+        for name, result in zip(tokens_by_network, results):
+            if isinstance(result, Exception):
+                logger.error(f"On-chain refresh failed for {name}: {result}")
+                stats['failed'] += len(tokens_by_network[name])
+            else:
+                stats['refreshed'] += result[0]
+                stats['failed'] += result[1]
+        stats['rpc_requests'] = self.rpc_requests - requests_before
+        return stats
+    
+    async def _refresh_network(self, network: str, tokens: List[Dict[str, Any]]) -> Tuple[int, int]:
+        """Read every token of one network and bulk-write the results"""
+        from eth_utils import is_address, to_checksum_address
+        from pymongo import UpdateOne
+        
+        functions = await self._get_functions()
+        calls = []
+        fields = []
+        for token in tokens:
+            if not is_address(token['contract_address']):
+                fields.append([])
+                continue
+            
+            target = to_checksum_address(token['contract_address'])
+            token_fields = []
+            for function_name, field in TOKEN_READ_FIELDS.items():
+                selector, output_types = functions[function_name]
+                if function_name == 'balanceOf':
+                    holder = token.get('deployer_address')
+                    if not holder or not is_address(holder):
+                        continue
+                    call_data = selector + bytes(12) + bytes.fromhex(holder[2:])
+                else:
+                    call_data = selector
+                calls.append((target, call_data, output_types))
+                token_fields.append(field)
+            fields.append(token_fields)
+        
+        values = iter(await self.call_many(network, calls))
+        now = datetime.utcnow()
+        updates = []
+        failed = 0
+        for token, token_fields in zip(tokens, fields):
+            update = {}
+            for field in token_fields:
+                value = next(values)
+                if value is not None:
+                    update[f"onchain.{field}"] = str(value) if field in TOKEN_AMOUNT_FIELDS else value
+            
+            if update:
+                update['onchain_refreshed_at'] = now
+                updates.append(UpdateOne({'id': token['id']}, {'$set': update}))
+            else:
+                failed += 1
+        
+        if updates:
+            await db.tokens.bulk_write(updates, ordered=False)
+        return len(updates), failed
+
+# ============= TRANSFER INDEXER =============
+TRANSFER_TOPIC = '0xddf252ad1be2c89b69c2b068fc378daa952ba7f163c4a11628f55a4df523b3ef'
+APPROVAL_TOPIC = '0x8c5be1e5ebec7d5bd14b71427d1e84f3dd0314c0f7b2291e5b200ac8c7c3b925'
+ZERO_ADDRESS = '0x' + '0' * 40
+# Orders logs within a network: block_number * LOG_POSITION_SCALE + log_index
+LOG_POSITION_SCALE = 1 << 20
+# Networks to index (comma separated); empty disables the indexer
+INDEXER_NETWORKS = [network.strip() for network in os.environ.get('INDEXER_NETWORKS', '').split(',') if network.strip()]
+INDEXER_MAX_RANGE = int(os.environ.get('INDEXER_MAX_RANGE', '2000'))
+# A range returning more logs than this makes the next range smaller
+INDEXER_MAX_LOGS = int(os.environ.get('INDEXER_MAX_LOGS', '10000'))
+INDEXER_ADDRESS_CHUNK = int(os.environ.get('INDEXER_ADDRESS_CHUNK', '500'))
+# eth_getLogs calls per backfill batch; small, since throttled providers fail items of big batches
+INDEXER_BACKFILL_BATCH = int(os.environ.get('INDEXER_BACKFILL_BATCH', '20'))
+# How long a backfill that fails even at a one-block range waits before it is tried again
+INDEXER_BACKFILL_RETRY = float(os.environ.get('INDEXER_BACKFILL_RETRY', '60'))
+INDEXER_ADDRESS_REFRESH = float(os.environ.get('INDEXER_ADDRESS_REFRESH', '30'))
+INDEXER_POLL_INTERVAL = float(os.environ.get('INDEXER_POLL_INTERVAL', '3'))
+INDEXER_LEASE_SECONDS = float(os.environ.get('INDEXER_LEASE_SECONDS', '60'))
+# Previous checkpoints (block, hash) kept to find the fork point after a reorg
+INDEXER_CHECKPOINT_HISTORY = int(os.environ.get('INDEXER_CHECKPOINT_HISTORY', '32'))
+
+def indexer_confirmations(network: str) -> int:
+    """Blocks kept behind head, overridable with INDEXER_CONFIRMATIONS_<NETWORK>"""
+    return int(os.environ.get(f"INDEXER_CONFIRMATIONS_{network.upper()}", NETWORK_CONFIGS[network]['confirmations']))
+
+# Decimal128 holds 34 significant digits; wider amounts are kept as strings
+DECIMAL128_LIMIT = 10 ** 34
+
+def to_decimal128(value: int):
+    """Exact Decimal128 for a token amount below DECIMAL128_LIMIT"""
+    from bson.decimal128 import Decimal128
+    return Decimal128(Decimal(value))
+
+def _topic_address(topic: str) -> str:
+    return '0x' + topic[-40:].lower()
+
+class TransferIndexer:
+    """Indexes Transfer and Approval logs of deployed tokens into Mongo, one loop per network
+    
+    Each network keeps a checkpoint in db.index_checkpoints and only indexes blocks
+    at least its confirmation depth behind head. Transfer and approval rows are
+    upserted by log id, and every balance remembers the position of the last log
+    applied to it, so re-running a range after a crash never double counts.
+    """
+    
+    def __init__(self, blockchain_service: BlockchainService, networks: List[str]):
+        self.blockchain_service = blockchain_service
+        self.networks = [network for network in networks if network in NETWORK_CONFIGS]
+        # Current block range per network, adapted to the log density
+        self.ranges: Dict[str, int] = {}
+        self.lag: Dict[str, int] = {}
+        self.logs_indexed = 0
+        self.reorgs = 0
+        self.running = False
+        self._tasks = []
+        # Indexed contract addresses mapped to their tax wallets, per network
+        self._addresses: Dict[str, Dict[str, str]] = {}
+        self._addresses_loaded: Dict[str, float] = {}
+        # Newly seen addresses catching up from their deploy block, per network
+        self._backfills: Dict[str, Dict[str, Dict[str, Any]]] = {}
+    
+    def start(self):
+        """Start one indexing loop per configured network"""
+        if self.running:
+            return
         
+        self.running = True
+        for network in self.networks:
+            self._tasks.append(asyncio.create_task(self._run(network)))
+    
+    async def stop(self):
+        """Stop the loops; each releases its network's lease"""
+        self.running = False
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+    
+    async def _run(self, network: str):
+        # Only one process indexes a network at a time
+        lease = MongoLease(f"transfer_indexer:{network}", INDEXER_LEASE_SECONDS)
         try:
-            # Try DexScreener first
-            price_data = await self._fetch_from_dexscreener(token_address, network)
+            while self.running:
+                caught_up = True
+                try:
+                    if await lease.try_acquire():
+                        caught_up = await self.index_once(network)
+                except Exception as e:
+                    logger.error(f"Transfer indexer error on {network}: {e}")
+                
+                # Keep going without pausing while behind, so indexing outpaces the chain
+                if caught_up:
+                    await asyncio.sleep(INDEXER_POLL_INTERVAL)
+        finally:
+            await lease.release()
+    
+    async def _get_addresses(self, network: str, pool: RpcPool, checkpoint_block: int) -> Dict[str, str]:
+        """Indexed contract addresses of a network mapped to their tax wallets
+        
+        Addresses seen for the first time are queued for a backfill from their
+        deploy block and join the main scan once it reaches the checkpoint.
+        """
+        from eth_utils import is_address
+        
+        loaded = self._addresses_loaded.get(network, 0.0)
+        if time.monotonic() - loaded < INDEXER_ADDRESS_REFRESH:
+            return self._addresses[network]
+        
+        addresses = {}
+        backfills = self._backfills.setdefault(network, {})
+        unresolved = []
+        async for token in db.tokens.find(
+            {'network': network, 'status': 'deployed', 'contract_address': {'$ne': None}},
+            {
+                '_id': 0, 'id': 1, 'contract_address': 1, 'deployer_address': 1, 'transaction_hash': 1,
+                'block_number': 1, 'indexed': 1, 'index_backfill_block': 1
+            }
+        ):
+            address = token['contract_address'].lower()
+            # Simulated deployments store placeholder addresses that nodes reject
+            if not is_address(address):
+                continue
             
-            if not price_data:
-                # Fallback to simulated price
-                price_data = self._generate_simulated_price(token_address)
+            # The deployer is the tax wallet of every token we deploy
+            tax_wallet = (token.get('deployer_address') or '').lower()
+            if token.get('indexed'):
+                addresses[address] = tax_wallet
+            elif address not in backfills:
+                backfill = {
+                    'token_id': token['id'],
+                    'tax_wallet': tax_wallet,
+                    'next_block': token.get('index_backfill_block', token.get('block_number')),
+                    'span': INDEXER_MAX_RANGE,
+                    'retry_at': 0.0
+                }
+                if backfill['next_block'] is not None:
+                    backfills[address] = backfill
+                elif token.get('transaction_hash'):
+                    unresolved.append((address, backfill, token['transaction_hash']))
+                else:
+                    # No way to find the deploy block; index from the checkpoint on
+                    backfill['next_block'] = checkpoint_block + 1
+                    backfills[address] = backfill
+        
+        # Deploy blocks of the remaining addresses come from their deployment receipts
+        for start in range(0, len(unresolved), INDEXER_ADDRESS_CHUNK):
+            chunk = unresolved[start:start + INDEXER_ADDRESS_CHUNK]
+            responses = await pool.batch([('eth_getTransactionReceipt', [tx_hash]) for _, _, tx_hash in chunk])
+            for (address, backfill, _), response in zip(chunk, responses):
+                if 'result' not in response:
+                    # Retried on the next refresh
+                    continue
+                receipt = response['result']
+                backfill['next_block'] = int(receipt['blockNumber'], 16) if receipt else checkpoint_block + 1
+                backfills[address] = backfill
+        
+        self._addresses[network] = addresses
+        self._addresses_loaded[network] = time.monotonic()
+        return addresses
+    
+    async def _backfill(self, network: str, pool: RpcPool, checkpoint_block: int) -> bool:
+        """Index one range for each backfilling address; True if any of them made progress
+        
+        Backfilling addresses stay out of the main scan until their history up to the
+        checkpoint is applied, so balances stay in log order. Each keeps its own block
+        range, and one that fails even for a single block is retried later instead of
+        holding up the network.
+        """
+        from pymongo import UpdateOne
+        
+        backfills = self._backfills.get(network)
+        if not backfills:
+            return False
+        
+        now = time.monotonic()
+        pending = [
+            (address, backfill) for address, backfill in backfills.items()
+            if backfill['next_block'] <= checkpoint_block and backfill['retry_at'] <= now
+        ][:INDEXER_ADDRESS_CHUNK]
+        
+        progressed = False
+        for start in range(0, len(pending), INDEXER_BACKFILL_BATCH):
+            chunk = pending[start:start + INDEXER_BACKFILL_BATCH]
+            ends = [min(backfill['next_block'] + backfill['span'] - 1, checkpoint_block) for _, backfill in chunk]
+            try:
+                responses = await pool.batch([
+                    ('eth_getLogs', [{
+                        'fromBlock': hex(backfill['next_block']),
+                        'toBlock': hex(end),
+                        'address': address,
+                        'topics': [[TRANSFER_TOPIC, APPROVAL_TOPIC]]
+                    }])
+                    for (address, backfill), end in zip(chunk, ends)
+                ])
+            except Exception as e:
+                responses = [{'error': {'message': str(e)}}] * len(chunk)
             
-            # Cache the result
-            self.price_cache[cache_key] = {
-                'data': price_data,
-                'timestamp': time.time()
-            }
+            logs = []
+            advanced = []
+            for (address, backfill), end, response in zip(chunk, ends, responses):
+                if 'result' in response:
+                    results = [log for log in response['result'] if not log.get('removed')]
+                    logs.extend(results)
+                    advanced.append((backfill, end + 1))
+                    if len(results) < INDEXER_MAX_LOGS // 4:
+                        backfill['span'] = min(backfill['span'] * 2, INDEXER_MAX_RANGE)
+                elif backfill['span'] > 1:
+                    backfill['span'] //= 2
+                else:
+                    backfill['retry_at'] = now + INDEXER_BACKFILL_RETRY
+                    logger.warning(f"Backfill of {address} on {network} deferred: {response.get('error')}")
             
-            return price_data
+            if not advanced:
+                continue
             
-        except Exception as e:
-            logger.error(f"Price fetch failed: {e}")
-            return self._generate_simulated_price(token_address)
+            await self._apply(network, logs, {address: backfill['tax_wallet'] for address, backfill in chunk})
+            for backfill, next_block in advanced:
+                backfill['next_block'] = next_block
+            await db.tokens.bulk_write([
+                UpdateOne({'id': backfill['token_id']}, {'$set': {'index_backfill_block': next_block}})
+                for backfill, next_block in advanced
+            ], ordered=False)
+            self.logs_indexed += len(logs)
+            progressed = True
+        
+        # Caught-up addresses join the main scan in this same pass
+        caught_up = [address for address, backfill in backfills.items() if backfill['next_block'] > checkpoint_block]
+        if caught_up:
+            await db.tokens.update_many(
+                {'id': {'$in': [backfills[address]['token_id'] for address in caught_up]}},
+                {'$set': {'indexed': True}}
+            )
+            for address in caught_up:
+                self._addresses[network][address] = backfills.pop(address)['tax_wallet']
+        
+        return progressed
     
-    async def _fetch_from_dexscreener(self, token_address: str, network: str) -> Optional[Dict]:
-        """Fetch price from DexScreener"""
-        network_map = {
-            'bsc': 'bsc',
-            'ethereum': 'ethereum',
-            'polygon': 'polygon'
-        }
+    async def index_once(self, network: str) -> bool:
+        """Index the next block range; returns True once caught up with the confirmed head"""
+        pool = self.blockchain_service.get_rpc_pool(network)
+        checkpoint = await db.index_checkpoints.find_one({'_id': network})
+        
+        (head,) = await pool.batch([('eth_blockNumber', [])])
+        if 'result' not in head:
+            raise ConnectionError(f"eth_blockNumber failed: {head.get('error')}")
+        safe_block = int(head['result'], 16) - indexer_confirmations(network)
+        
+        if checkpoint is None:
+            # Start at the confirmed head unless told to backfill from an earlier block; saved
+            # right away so backfills and the main scan agree on it while the head moves
+            start_block = int(os.environ.get(f"INDEXER_START_BLOCK_{network.upper()}", safe_block))
+            checkpoint = {'block': start_block - 1, 'block_hash': None, 'history': []}
+            await db.index_checkpoints.update_one(
+                {'_id': network},
+                {'$setOnInsert': {**checkpoint, 'updated_at': datetime.utcnow()}},
+                upsert=True
+            )
+        
+        addresses = await self._get_addresses(network, pool, checkpoint['block'])
+        # The main scan keeps going while backfills catch up to its checkpoint
+        backfilling = await self._backfill(network, pool, checkpoint['block'])
+        
+        from_block = checkpoint['block'] + 1
+        self.lag[network] = max(safe_block - checkpoint['block'], 0)
+        if from_block > safe_block:
+            return not backfilling
+        
+        span = self.ranges.get(network, INDEXER_MAX_RANGE)
+        to_block = min(safe_block, from_block + span - 1)
+        
+        # Block headers for reorg checks and every log query go out as one batch
+        calls: List[Tuple[str, List[Any]]] = [('eth_getBlockByNumber', [hex(to_block), False])]
+        if checkpoint['block_hash']:
+            calls.append(('eth_getBlockByNumber', [hex(checkpoint['block']), False]))
+        first_log_call = len(calls)
+        address_list = list(addresses)
+        for start in range(0, len(address_list), INDEXER_ADDRESS_CHUNK):
+            calls.append(('eth_getLogs', [{
+                'fromBlock': hex(from_block),
+                'toBlock': hex(to_block),
+                'address': address_list[start:start + INDEXER_ADDRESS_CHUNK],
+                'topics': [[TRANSFER_TOPIC, APPROVAL_TOPIC]]
+            }]))
+        responses = await pool.batch(calls)
+        
+        if checkpoint['block_hash']:
+            parent = responses[1].get('result')
+            if parent and parent['hash'] != checkpoint['block_hash']:
+                # The checkpoint block was replaced; undo work past the fork and re-index
+                self.reorgs += 1
+                history = await self._find_fork_point(pool, network, checkpoint)
+                fork_block = history[-1][0] if history else max(checkpoint['block'] - 2 * indexer_confirmations(network), 0)
+                logger.warning(f"Reorg detected on {network} at block {checkpoint['block']}, rewinding to {fork_block}")
+                await self.rewind(network, fork_block, history)
+                # Backfills that got past the fork lost those rows as well
+                for backfill in self._backfills.get(network, {}).values():
+                    backfill['next_block'] = min(backfill['next_block'], fork_block + 1)
+                await db.tokens.update_many(
+                    {'network': network, 'index_backfill_block': {'$gt': fork_block + 1}},
+                    {'$set': {'index_backfill_block': fork_block + 1}}
+                )
+                return False
+        
+        header = responses[0].get('result')
+        if not header:
+            raise ConnectionError(f"Block {to_block} unavailable: {responses[0].get('error')}")
+        
+        logs = []
+        for response in responses[first_log_call:]:
+            if 'result' not in response:
+                if span > 1:
+                    # Most providers reject ranges with too many results; retry a smaller one
+                    self.ranges[network] = max(span // 2, 1)
+                    return False
+                raise ConnectionError(f"eth_getLogs failed: {response.get('error')}")
+            logs.extend(log for log in response['result'] if not log.get('removed'))
+        
+        await self._apply(network, logs, addresses)
+        history = checkpoint.get('history', [])[-(INDEXER_CHECKPOINT_HISTORY - 1):] + [[to_block, header['hash']]]
+        await db.index_checkpoints.update_one(
+            {'_id': network},
+            {'$set': {'block': to_block, 'block_hash': header['hash'], 'history': history, 'updated_at': datetime.utcnow()}},
+            upsert=True
+        )
         
-        dex_network = network_map.get(network)
-        if not dex_network:
+        # Shrink dense ranges and grow sparse ones
+        if len(logs) > INDEXER_MAX_LOGS:
+            self.ranges[network] = max(span // 2, 1)
+        elif len(logs) < INDEXER_MAX_LOGS // 4:
+            self.ranges[network] = min(span * 2, INDEXER_MAX_RANGE)
+        
+        self.logs_indexed += len(logs)
+        self.lag[network] = safe_block - to_block
+        return to_block >= safe_block and not backfilling
+    
+    async def _find_fork_point(self, pool: RpcPool, network: str, checkpoint: Dict[str, Any]) -> List[List[Any]]:
+        """Checkpoint history up to the latest block whose hash still matches the chain"""
+        history = checkpoint.get('history', [])
+        if not history:
+            return []
+        
+        responses = await pool.batch([('eth_getBlockByNumber', [hex(block), False]) for block, _ in history])
+        for index in range(len(history) - 1, -1, -1):
+            block_hash = history[index][1]
+            if (responses[index].get('result') or {}).get('hash') == block_hash:
+                return history[:index + 1]
+        return []
+    
+    async def _apply(self, network: str, logs: List[Dict[str, Any]], tax_wallets: Dict[str, str]):
+        """Bulk-upsert transfer and approval rows and apply balance changes"""
+        from pymongo import UpdateOne
+        from pymongo.errors import BulkWriteError
+        
+        logs.sort(key=lambda log: (int(log['blockNumber'], 16), int(log['logIndex'], 16)))
+        transfers = []
+        approvals = []
+        # (token, holder) -> [balance delta, position of the last log touching it]
+        balance_changes: Dict[Tuple[str, str], List[int]] = {}
+        
+        for index, log in enumerate(logs):
+            topics = log['topics']
+            if len(topics) != 3:
+                continue
+            
+            block_number = int(log['blockNumber'], 16)
+            log_index = int(log['logIndex'], 16)
+            position = block_number * LOG_POSITION_SCALE + log_index
+            token = log['address'].lower()
+            source, target = _topic_address(topics[1]), _topic_address(topics[2])
+            value = int(log['data'], 16) if log['data'] not in ('0x', '') else 0
+            row = {
+                'network': network,
+                'token': token,
+                'block_number': block_number,
+                'block_hash': log['blockHash'],
+                'transaction_hash': log['transactionHash'],
+                'log_index': log_index,
+                'position': position
+            }
+            row_id = f"{network}:{log['transactionHash']}:{log_index}"
+            
+            if topics[0] == APPROVAL_TOPIC:
+                # Allowances are often uint256 max, too wide for Decimal128
+                row.update({'owner': source, 'spender': target, 'value': str(value)})
+                approvals.append(UpdateOne({'_id': row_id}, {'$setOnInsert': row}, upsert=True))
+                continue
+            
+            # Taxed transfers emit the tax leg to the tax wallet right before the main leg
+            following = logs[index + 1] if index + 1 < len(logs) else None
+            is_tax = bool(
+                following
+                and target == tax_wallets.get(token)
+                and following['transactionHash'] == log['transactionHash']
+                and following['topics'][:2] == topics[:2]
+            )
+            row.update({'from': source, 'to': target, 'tax': is_tax})
+            if value >= DECIMAL128_LIMIT:
+                # Keep the exact amount but leave balances alone rather than stall the range
+                logger.warning(f"Transfer {row_id} amount {value} is too wide for Decimal128 balances")
+                row['value'] = str(value)
+                transfers.append(UpdateOne({'_id': row_id}, {'$setOnInsert': row}, upsert=True))
+                continue
+            
+            row['value'] = to_decimal128(value)
+            transfers.append(UpdateOne({'_id': row_id}, {'$setOnInsert': row}, upsert=True))
+            
+            for holder, delta in ((source, -value), (target, value)):
+                if holder == ZERO_ADDRESS:
+                    continue
+                change = balance_changes.setdefault((token, holder), [0, 0])
+                change[0] += delta
+                change[1] = position
+        
+        if transfers:
+            await db.transfers.bulk_write(transfers, ordered=False)
+        if approvals:
+            await db.approvals.bulk_write(approvals, ordered=False)
+        
+        balances = [
+            UpdateOne(
+                # Skipped when this batch was already applied to the balance
+                {'_id': f"{network}:{token}:{holder}", 'position': {'$lt': position}},
+                {
+                    '$inc': {'balance': to_decimal128(delta)},
+                    '$set': {'network': network, 'token': token, 'holder': holder, 'position': position}
+                },
+                upsert=True
+            )
+            for (token, holder), (delta, position) in balance_changes.items()
+            if abs(delta) < DECIMAL128_LIMIT
+        ]
+        if balances:
+            try:
+                await db.balances.bulk_write(balances, ordered=False)
+            except BulkWriteError as e:
+                # Already-applied balances fail their filter and collide on upsert
+                if any(error.get('code') != 11000 for error in e.details.get('writeErrors', [])):
+                    raise
+    
+    async def rewind(self, network: str, block: int, history: Optional[List[List[Any]]] = None):
+        """Undo transfers, approvals and balance changes after a block"""
+        from pymongo import UpdateOne
+        
+        boundary = (block + 1) * LOG_POSITION_SCALE
+        reverted: Dict[Tuple[str, str], int] = {}
+        async for row in db.transfers.find(
+            {'network': network, 'position': {'$gte': boundary}},
+            {'_id': 0, 'token': 1, 'from': 1, 'to': 1, 'value': 1}
+        ):
+            if isinstance(row['value'], str):
+                # Oversized amounts never touched balances
+                continue
+            value = int(row['value'].to_decimal())
+            for holder, delta in ((row['from'], value), (row['to'], -value)):
+                if holder != ZERO_ADDRESS:
+                    key = (row['token'], holder)
+                    reverted[key] = reverted.get(key, 0) + delta
+        
+        if reverted:
+            await db.balances.bulk_write([
+                UpdateOne(
+                    # Balances already rolled back have a position before the boundary
+                    {'_id': f"{network}:{token}:{holder}", 'position': {'$gte': boundary}},
+                    {'$inc': {'balance': to_decimal128(delta)}, '$set': {'position': boundary - 1}}
+                )
+                for (token, holder), delta in reverted.items()
+            ], ordered=False)
+        
+        await db.transfers.delete_many({'network': network, 'position': {'$gte': boundary}})
+        await db.approvals.delete_many({'network': network, 'position': {'$gte': boundary}})
+        await db.index_checkpoints.update_one(
+            {'_id': network},
+            {'$set': {
+                'block': block,
+                # Without a matching history entry the new checkpoint cannot be verified
+                'block_hash': history[-1][1] if history else None,
+                'history': history or [],
+                'updated_at': datetime.utcnow()
+            }},
+            upsert=True
+        )
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'networks': self.networks,
+            'lag_blocks': self.lag,
+            'block_ranges': self.ranges,
+            'logs_indexed': self.logs_indexed,
+            'reorgs': self.reorgs
+        }
+
+# ============= HTTP CLIENT =============
+# Connection pool settings shared by every outbound HTTP session
+HTTP_POOL_LIMIT = int(os.environ.get('HTTP_POOL_LIMIT', '100'))
+HTTP_POOL_LIMIT_PER_HOST = int(os.environ.get('HTTP_POOL_LIMIT_PER_HOST', '20'))
+HTTP_DNS_CACHE_TTL = int(os.environ.get('HTTP_DNS_CACHE_TTL', '300'))
+HTTP_KEEPALIVE_TIMEOUT = float(os.environ.get('HTTP_KEEPALIVE_TIMEOUT', '30'))
+HTTP_TIMEOUT = float(os.environ.get('HTTP_TIMEOUT', '10'))
+
+def create_http_session() -> aiohttp.ClientSession:
+    """Create a pooled keep-alive HTTP session"""
+    connector = aiohttp.TCPConnector(
+        limit=HTTP_POOL_LIMIT,
+        limit_per_host=HTTP_POOL_LIMIT_PER_HOST,
+        ttl_dns_cache=HTTP_DNS_CACHE_TTL,
+        keepalive_timeout=HTTP_KEEPALIVE_TIMEOUT
+    )
+    return aiohttp.ClientSession(
+        connector=connector,
+        timeout=aiohttp.ClientTimeout(total=HTTP_TIMEOUT)
+    )
+
+# ============= PRICE SERVICE =============
+# DexScreener chain ids for the networks it indexes
+DEXSCREENER_NETWORKS = {
+    'bsc': 'bsc',
+    'ethereum': 'ethereum',
+    'polygon': 'polygon'
+}
+
+# Maximum number of addresses accepted by /latest/dex/tokens/ in one call
+DEXSCREENER_MAX_BATCH = 30
+
+class PriceCacheEntry:
+    """Compact cached price record"""
+    __slots__ = ('price_usd', 'volume_24h', 'change_24h', 'liquidity', 'market_cap', 'simulated', 'timestamp')
+    
+    def __init__(self, price_data: Dict, timestamp: float):
+        self.price_usd = price_data.get('price_usd', 0.0)
+        self.volume_24h = price_data.get('volume_24h', 0.0)
+        self.change_24h = price_data.get('change_24h', 0.0)
+        self.liquidity = price_data.get('liquidity', 0.0)
+        self.market_cap = price_data.get('market_cap', 0.0)
+        self.simulated = price_data.get('simulated', False)
+        self.timestamp = timestamp
+    
+    def to_dict(self) -> Dict:
+        """Rebuild the price data dict returned to callers"""
+        price_data = {
+            'price_usd': self.price_usd,
+            'volume_24h': self.volume_24h,
+            'change_24h': self.change_24h,
+            'liquidity': self.liquidity,
+            'market_cap': self.market_cap
+        }
+        if self.simulated:
+            price_data['simulated'] = True
+        return price_data
+
+class PriceCache:
+    """Bounded LRU cache with TTL expiry for price data"""
+    
+    def __init__(self, max_entries: int, ttl: float):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: OrderedDict[str, PriceCacheEntry] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+    
+    def get(self, key: str) -> Optional[PriceCacheEntry]:
+        """Get a live entry and mark it as recently used"""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        
+        if time.time() - entry.timestamp >= self.ttl:
+            del self._entries[key]
+            self.expirations += 1
+            self.misses += 1
             return None
         
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry
+    
+    def set(self, key: str, price_data: Dict, timestamp: float):
+        """Store price data, evicting the least recently used entries when full"""
+        self._entries[key] = PriceCacheEntry(price_data, timestamp)
+        self._entries.move_to_end(key)
+        
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+    
+    def stats(self) -> Dict[str, int]:
+        """Get cache size and counters"""
+        return {
+            'entries': len(self._entries),
+            'max_entries': self.max_entries,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'expirations': self.expirations
+        }
+
+class PriceService:
+    def __init__(self):
+        # Entries younger than the soft TTL are fresh; between soft and hard TTL
+        # they are served stale while a background refresh runs
+        self.soft_ttl = float(os.environ.get('PRICE_CACHE_SOFT_TTL', '60'))
+        self.hard_ttl = float(os.environ.get('PRICE_CACHE_HARD_TTL', '300'))
+        self.price_cache = PriceCache(
+            max_entries=int(os.environ.get('PRICE_CACHE_MAX_ENTRIES', '50000')),
+            ttl=self.hard_ttl
+        )
+        # Window during which concurrent single-token lookups are grouped
+        self.batch_window = float(os.environ.get('PRICE_BATCH_WINDOW_MS', '50')) / 1000
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._pending_lookups: Dict[str, List[str]] = {}
+        self._flush_handles: Dict[str, asyncio.TimerHandle] = {}
+        self._fetch_tasks = set()
+        self._session: Optional[aiohttp.ClientSession] = None
+    
+    async def start(self):
+        """Open the shared HTTP session"""
+        self._get_session()
+    
+    async def close(self):
+        """Close the shared HTTP session"""
+        if self._session and not self._session.closed:
+            await self._session.close()
+        self._session = None
+    
+    def _get_session(self) -> aiohttp.ClientSession:
+        """Get the shared HTTP session, creating it on first use"""
+        if self._session is None or self._session.closed:
+            self._session = create_http_session()
+        return self._session
+        
+    async def get_token_price(self, token_address: str, network: str) -> Optional[Dict]:
+        """Get token price from various sources"""
+        cache_key = f"{network}:{token_address}"
+        
+        # Check cache
+        price_data, stale = self._get_cached(cache_key)
+        if price_data is not None:
+            if stale:
+                # Serve the stale value while a single background fetch refreshes it
+                self._lookup(token_address, network)
+            return price_data
+        
         try:
-            url = f"https://api.dexscreener.com/latest/dex/tokens/{token_address}"
+            # Join the in-flight fetch for this token, or the next coalesced batch
+            return await asyncio.shield(self._lookup(token_address, network))
+            
+        except Exception as e:
+            logger.error(f"Price fetch failed: {e}")
+            return self._generate_simulated_price(token_address)
+    
+    async def get_token_prices(self, token_addresses: List[str], network: str) -> Dict[str, Optional[Dict]]:
+        """Get prices for many tokens on one network with batched requests"""
+        loop = asyncio.get_running_loop()
+        results = {}
+        waiting = {}
+        to_fetch = []
+        
+        for token_address in dict.fromkeys(token_addresses):
+            cache_key = f"{network}:{token_address}"
+            price_data, stale = self._get_cached(cache_key)
+            if price_data is not None:
+                if stale:
+                    self._lookup(token_address, network)
+                results[token_address] = price_data
+                continue
             
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url, timeout=10) as response:
-                    if response.status == 200:
-                        data = await response.json()
+            future = self._inflight.get(cache_key)
+            if future is None:
+                future = loop.create_future()
+                self._inflight[cache_key] = future
+                to_fetch.append(token_address)
+            waiting[token_address] = future
+        
+        if to_fetch:
+            # Caller already holds a full list, so skip the coalescing window
+            self._start_fetch(to_fetch, network)
+        
+        if waiting:
+            prices = await asyncio.gather(*(asyncio.shield(f) for f in waiting.values()))
+            results.update(zip(waiting, prices))
+        
+        return results
+    
+    def _get_cached(self, cache_key: str) -> Tuple[Optional[Dict], bool]:
+        """Get cached price data and whether it is due for a refresh"""
+        entry = self.price_cache.get(cache_key)
+        if entry is None:
+            return None, True
+        
+        return entry.to_dict(), time.time() - entry.timestamp >= self.soft_ttl
+    
+    async def _fetch_prices(self, token_addresses: List[str], network: str) -> Dict[str, Dict]:
+        """Fetch prices in DexScreener-sized chunks and cache the results"""
+        chunks = [
+            token_addresses[i:i + DEXSCREENER_MAX_BATCH]
+            for i in range(0, len(token_addresses), DEXSCREENER_MAX_BATCH)
+        ]
+        
+        fetched = {}
+        for chunk_prices in await asyncio.gather(
+            *(self._fetch_from_dexscreener(chunk, network) for chunk in chunks)
+        ):
+            fetched.update(chunk_prices)
+        
+        results = {}
+        timestamp = time.time()
+        for token_address in token_addresses:
+            # Fallback to simulated price for tokens DexScreener doesn't know
+            price_data = fetched.get(token_address.lower()) or self._generate_simulated_price(token_address)
+            
+            # Cache the result
+            self.price_cache.set(f"{network}:{token_address}", price_data, timestamp)
+            results[token_address] = price_data
+        
+        return results
+    
+    def _lookup(self, token_address: str, network: str) -> asyncio.Future:
+        """Get the single in-flight fetch for a token, queueing one if needed"""
+        cache_key = f"{network}:{token_address}"
+        future = self._inflight.get(cache_key)
+        if future is not None:
+            return future
+        
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._inflight[cache_key] = future
+        
+        pending = self._pending_lookups.setdefault(network, [])
+        pending.append(token_address)
+        
+        if len(pending) >= DEXSCREENER_MAX_BATCH:
+            # Batch is full, no point waiting for the window to close
+            self._flush_lookups(network)
+        elif network not in self._flush_handles:
+            self._flush_handles[network] = loop.call_later(
+                self.batch_window, self._flush_lookups, network
+            )
+        
+        return future
+    
+    def _flush_lookups(self, network: str):
+        """Send the pending batch for a network"""
+        handle = self._flush_handles.pop(network, None)
+        if handle:
+            handle.cancel()
+        
+        pending = self._pending_lookups.pop(network, None)
+        if pending:
+            self._start_fetch(pending, network)
+    
+    def _start_fetch(self, token_addresses: List[str], network: str):
+        """Resolve in-flight futures for a list of tokens in a background task"""
+        task = asyncio.create_task(self._resolve_lookups(token_addresses, network))
+        self._fetch_tasks.add(task)
+        task.add_done_callback(self._fetch_tasks.discard)
+    
+    async def _resolve_lookups(self, token_addresses: List[str], network: str):
+        """Fetch a batch and wake up every caller waiting on it"""
+        try:
+            results = await self._fetch_prices(token_addresses, network)
+        except Exception as e:
+            logger.error(f"Price fetch failed: {e}")
+            results = {}
+        
+        for token_address in token_addresses:
+            future = self._inflight.pop(f"{network}:{token_address}", None)
+            if future is not None and not future.done():
+                future.set_result(
+                    results.get(token_address) or self._generate_simulated_price(token_address)
+                )
+    
+    async def _fetch_from_dexscreener(self, token_addresses: List[str], network: str) -> Dict[str, Dict]:
+        """Fetch prices for up to 30 tokens from DexScreener, keyed by lowercase address"""
+        dex_network = DEXSCREENER_NETWORKS.get(network)
+        if not dex_network:
+            return {}
+        
+        prices = {}
+        
+        try:
+            url = f"https://api.dexscreener.com/latest/dex/tokens/{','.join(token_addresses)}"
+            
+            async with self._get_session().get(url) as response:
+                if response.status == 200:
+                    data = await response.json()
+                    
+                    # Get the pair with highest liquidity for each token
+                    best_pairs = {}
+                    for pair in data.get('pairs') or []:
+                        if pair.get('chainId') != dex_network:
+                            continue
                         
-                        if data.get('pairs'):
-                            # Get the pair with highest liquidity
-                            best_pair = max(data['pairs'], 
-                                          key=lambda p: float(p.get('liquidity', {}).get('usd', 0)))
-                            
-                            return {
-                                'price_usd': float(best_pair.get('priceUsd', 0)),
-                                'volume_24h': float(best_pair.get('volume', {}).get('h24', 0)),
-                                'change_24h': float(best_pair.get('priceChange', {}).get('h24', 0)),
-                                'liquidity': float(best_pair.get('liquidity', {}).get('usd', 0)),
-                                'market_cap': float(best_pair.get('marketCap', 0))
-                            }
+                        address = (pair.get('baseToken') or {}).get('address', '').lower()
+                        liquidity = float((pair.get('liquidity') or {}).get('usd', 0))
+                        if address not in best_pairs or liquidity > best_pairs[address][0]:
+                            best_pairs[address] = (liquidity, pair)
+                    
+                    for address, (liquidity, best_pair) in best_pairs.items():
+                        prices[address] = {
+                            'price_usd': float(best_pair.get('priceUsd', 0)),
+                            'volume_24h': float((best_pair.get('volume') or {}).get('h24', 0)),
+                            'change_24h': float((best_pair.get('priceChange') or {}).get('h24', 0)),
+                            'liquidity': liquidity,
+                            'market_cap': float(best_pair.get('marketCap', 0))
+                        }
         except Exception as e:
             logger.error(f"DexScreener API error: {e}")
         
-        return None
+        return prices
     
     def _generate_simulated_price(self, token_address: str) -> Dict:
         """Generate simulated price data for demo"""
@@ -526,23 +2315,262 @@ class PriceService:
             'simulated': True
         }
 
+# ============= LEASES =============
+class MongoLease:
+    """Named lease in the leases collection; at most one process holds it at a time"""
+    
+    def __init__(self, name: str, ttl: float):
+        self.name = name
+        self.ttl = ttl
+        self.holder = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.held = False
+    
+    async def try_acquire(self) -> bool:
+        """Take or renew the lease; fails while another live holder has it"""
+        from pymongo.errors import DuplicateKeyError
+        
+        now = datetime.utcnow()
+        try:
+            await db.leases.update_one(
+                {'_id': self.name, '$or': [{'holder': self.holder}, {'expires_at': {'$lt': now}}]},
+                {'$set': {'holder': self.holder, 'expires_at': now + timedelta(seconds=self.ttl)}},
+                upsert=True
+            )
+            acquired = True
+        except DuplicateKeyError:
+            # Lease exists and belongs to someone else
+            acquired = False
+        
+        if acquired != self.held:
+            logger.info(f"{'Acquired' if acquired else 'Lost'} lease {self.name}")
+        self.held = acquired
+        return acquired
+    
+    async def release(self):
+        """Give the lease up early so another process can take over"""
+        if self.held:
+            await db.leases.delete_one({'_id': self.name, 'holder': self.holder})
+            self.held = False
+
 # ============= AUTO TRADING SERVICE =============
-class AutoTradingService:
+class StrategyStore:
+    """Struct-of-arrays store for active auto-sell strategies, indexed by slot"""
+    
     def __init__(self):
-        self.active_strategies = {}
+        self.strategy_ids: List[Optional[str]] = []
+        self.slots: Dict[str, int] = {}
+        self._free_slots: List[int] = []
+        # Interned (network, token_address) and user keys
+        self.token_keys: List[Tuple[str, str]] = []
+        self.token_ids: Dict[Tuple[str, str], int] = {}
+        self.user_keys: List[str] = []
+        self._user_ids: Dict[str, int] = {}
+        # Per-slot columns
+        self.tokens = array('i')
+        self.users = array('i')
+        self.trigger_prices = array('d')
+        self.sell_percentages = array('d')
+        self.last_check = array('d')
+        self.triggers_hit = array('I')
+        self.enabled_mask = bytearray()
+        # Number of enabled strategies per interned token
+        self.enabled_per_token = array('i')
+    
+    def __len__(self) -> int:
+        return len(self.slots)
+    
+    def __contains__(self, strategy_id: str) -> bool:
+        return strategy_id in self.slots
+    
+    def _intern_token(self, key: Tuple[str, str]) -> int:
+        token = self.token_ids.get(key)
+        if token is None:
+            token = len(self.token_keys)
+            self.token_keys.append(key)
+            self.token_ids[key] = token
+            self.enabled_per_token.append(0)
+        return token
+    
+    def _intern_user(self, user_id: str) -> int:
+        user = self._user_ids.get(user_id)
+        if user is None:
+            user = len(self.user_keys)
+            self.user_keys.append(user_id)
+            self._user_ids[user_id] = user
+        return user
+    
+    def add(
+        self,
+        strategy_id: str,
+        user_id: str,
+        network: str,
+        token_address: str,
+        trigger_price: float,
+        sell_percentage: float,
+        enabled: bool = True
+    ):
+        """Store a strategy, replacing any previous version with the same id"""
+        if strategy_id in self.slots:
+            self.remove(strategy_id)
+        
+        token = self._intern_token((network, token_address))
+        user = self._intern_user(user_id)
+        
+        if self._free_slots:
+            slot = self._free_slots.pop()
+            self.strategy_ids[slot] = strategy_id
+            self.tokens[slot] = token
+            self.users[slot] = user
+            self.trigger_prices[slot] = trigger_price
+            self.sell_percentages[slot] = sell_percentage
+            self.last_check[slot] = 0.0
+            self.triggers_hit[slot] = 0
+        else:
+            slot = len(self.strategy_ids)
+            self.strategy_ids.append(strategy_id)
+            self.tokens.append(token)
+            self.users.append(user)
+            self.trigger_prices.append(trigger_price)
+            self.sell_percentages.append(sell_percentage)
+            self.last_check.append(0.0)
+            self.triggers_hit.append(0)
+            if slot % 8 == 0:
+                self.enabled_mask.append(0)
+        
+        self.slots[strategy_id] = slot
+        self._set_enabled(slot, enabled)
+    
+    def remove(self, strategy_id: str):
+        """Drop a strategy; its slot is reused by the next add"""
+        slot = self.slots.pop(strategy_id, None)
+        if slot is None:
+            return
+        
+        self._set_enabled(slot, False)
+        self.strategy_ids[slot] = None
+        self._free_slots.append(slot)
+    
+    def set_enabled(self, strategy_id: str, enabled: bool):
+        """Enable or disable a strategy without removing it"""
+        slot = self.slots.get(strategy_id)
+        if slot is not None:
+            self._set_enabled(slot, enabled)
+    
+    def _set_enabled(self, slot: int, enabled: bool):
+        byte, bit = divmod(slot, 8)
+        if bool(self.enabled_mask[byte] >> bit & 1) == enabled:
+            return
+        
+        if enabled:
+            self.enabled_mask[byte] |= 1 << bit
+            self.enabled_per_token[self.tokens[slot]] += 1
+        else:
+            self.enabled_mask[byte] &= ~(1 << bit) & 0xFF
+            self.enabled_per_token[self.tokens[slot]] -= 1
+    
+    def active_tokens(self) -> List[Tuple[str, str]]:
+        """(network, token_address) pairs with at least one enabled strategy"""
+        return [self.token_keys[token] for token, count in enumerate(self.enabled_per_token) if count]
+    
+    def triggered(self, prices):
+        """Slots of enabled strategies whose trigger is reached by a price vector indexed by token
+        
+        Tokens without a price should be NaN so they never trigger.
+        """
+        import numpy as np
+        
+        count = len(self.strategy_ids)
+        if not count:
+            return np.empty(0, dtype=np.int64)
+        
+        enabled = np.unpackbits(
+            np.frombuffer(self.enabled_mask, dtype=np.uint8), bitorder='little'
+        )[:count].astype(bool)
+        token_prices = prices[np.frombuffer(self.tokens, dtype=np.int32)]
+        reached = token_prices >= np.frombuffer(self.trigger_prices, dtype=np.float64)
+        return np.flatnonzero(enabled & reached)
+
+# Fields of auto_sell_configs needed to rebuild in-memory strategies
+STRATEGY_PROJECTION = {
+    '_id': 0, 'id': 1, 'user_id': 1, 'token_address': 1, 'network': 1,
+    'trigger_price': 1, 'sell_percentage': 1, 'enabled': 1, 'created_at': 1, 'updated_at': 1
+}
+
+class AutoTradingService:
+    def __init__(self, price_service: 'PriceService'):
+        self.price_service = price_service
+        self.strategies = StrategyStore()
+        self.check_interval = float(os.environ.get('AUTO_SELL_INTERVAL', '30'))
+        self.sync_interval = float(os.environ.get('AUTO_SELL_SYNC_INTERVAL', '10'))
+        # Only the lease holder evaluates triggers, so each tick runs once across workers
+        self.lease = MongoLease(
+            'auto_sell_monitor',
+            float(os.environ.get('AUTO_SELL_LEASE_SECONDS', str(max(3 * self.check_interval, 30))))
+        )
+        self._synced_until: Optional[datetime] = None
         self.monitoring = False
     
+    def _load_document(self, doc: Dict[str, Any]):
+        """Apply one auto_sell_configs document to the in-memory state"""
+        if not doc.get('enabled', True):
+            self.strategies.remove(doc['id'])
+            return
+        
+        self.strategies.add(
+            doc['id'],
+            doc.get('user_id'),
+            doc['network'],
+            doc['token_address'],
+            doc['trigger_price'],
+            doc['sell_percentage']
+        )
+    
+    async def hydrate(self) -> int:
+        """Load every enabled strategy from Mongo with a streaming cursor"""
+        started = datetime.utcnow()
+        count = 0
+        
+        cursor = db.auto_sell_configs.find({'enabled': True}, STRATEGY_PROJECTION).batch_size(1000)
+        async for doc in cursor:
+            self._load_document(doc)
+            count += 1
+        
+        self._synced_until = started
+        logger.info(f"Loaded {count} auto-sell strategies")
+        return count
+    
+    async def sync(self) -> int:
+        """Apply strategies created or changed since the last sync (including by other workers)"""
+        if self._synced_until is None:
+            return await self.hydrate()
+        
+        started = datetime.utcnow()
+        # Overlap the window a little so writes racing the previous sync are not missed
+        since = self._synced_until - timedelta(seconds=5)
+        count = 0
+        
+        cursor = db.auto_sell_configs.find({'updated_at': {'$gte': since}}, STRATEGY_PROJECTION).batch_size(1000)
+        async for doc in cursor:
+            self._load_document(doc)
+            count += 1
+        
+        self._synced_until = started
+        return count
+    
     async def setup_auto_sell(self, config: AutoSellConfig, user_id: str):
         """Setup automatic selling strategy"""
         strategy_id = str(uuid.uuid4())
-        
-        self.active_strategies[strategy_id] = {
-            'user_id': user_id,
-            'config': config,
-            'created_at': datetime.utcnow(),
-            'last_check': None,
-            'triggers_hit': 0
-        }
+        now = datetime.utcnow()
+        
+        self.strategies.add(
+            strategy_id,
+            user_id,
+            config.network,
+            config.token_address,
+            config.trigger_price,
+            config.sell_percentage,
+            config.enabled
+        )
         
         # Save to database
         await db.auto_sell_configs.insert_one({
@@ -553,7 +2581,8 @@ class AutoTradingService:
             'trigger_price': config.trigger_price,
             'sell_percentage': config.sell_percentage,
             'enabled': config.enabled,
-            'created_at': datetime.utcnow()
+            'created_at': now,
+            'updated_at': now
         })
         
         return strategy_id
@@ -564,43 +2593,90 @@ class AutoTradingService:
             return
         
         self.monitoring = True
-        price_service = PriceService()
+        next_sync = next_check = 0.0
         
         try:
             while self.monitoring:
-                for strategy_id, strategy in list(self.active_strategies.items()):
-                    try:
-                        config = strategy['config']
-                        if not config.enabled:
-                            continue
-                        
-                        # Get current price
-                        price_data = await price_service.get_token_price(
-                            config.token_address, 
-                            config.network
-                        )
-                        
-                        if price_data and price_data['price_usd'] >= config.trigger_price:
-                            # Execute sell
-                            await self._execute_auto_sell(strategy_id, strategy, price_data)
+                now = time.time()
+                
+                try:
+                    # Every worker keeps its strategies in sync so it can take over instantly
+                    if now >= next_sync:
+                        next_sync = now + self.sync_interval
+                        await self.sync()
                     
-                    except Exception as e:
-                        logger.error(f"Auto-sell monitoring error for {strategy_id}: {e}")
+                    if now >= next_check:
+                        next_check = now + self.check_interval
+                        if await self.lease.try_acquire():
+                            await self.check_triggers()
+                except Exception as e:
+                    logger.error(f"Auto-sell monitoring error: {e}")
                 
-                # Wait before next check
-                await asyncio.sleep(30)  # Check every 30 seconds
+                # Wait until the next sync or check is due
+                await asyncio.sleep(max(min(next_sync, next_check) - time.time(), 0))
                 
-        except Exception as e:
-            logger.error(f"Auto-sell monitoring error: {e}")
         finally:
             self.monitoring = False
+            try:
+                await self.lease.release()
+            except Exception as e:
+                logger.error(f"Auto-sell lease release failed: {e}")
     
-    async def _execute_auto_sell(self, strategy_id: str, strategy: Dict, price_data: Dict):
-        """Execute automatic sell order"""
-        config = strategy['config']
+    async def stop(self):
+        """Stop monitoring and hand the lease to another worker"""
+        self.monitoring = False
+        await self.lease.release()
+    
+    async def check_triggers(self) -> int:
+        """Run one tick: fetch each watched token's price once and fire reached triggers"""
+        import numpy as np
+        
+        tokens_by_network: Dict[str, List[str]] = {}
+        for network, token_address in self.strategies.active_tokens():
+            tokens_by_network.setdefault(network, []).append(token_address)
+        
+        if not tokens_by_network:
+            return 0
+        
+        # One batched price request per network, all networks concurrently
+        networks = list(tokens_by_network)
+        price_maps = await asyncio.gather(
+            *(self.price_service.get_token_prices(tokens_by_network[network], network) for network in networks),
+            return_exceptions=True
+        )
         
-        # Log the sell execution
-        logger.info(f"Auto-sell triggered for {config.token_address} at price {price_data['price_usd']}")
+        # Price vector indexed by interned token; unpriced tokens stay NaN
+        store = self.strategies
+        prices = np.full(len(store.token_keys), np.nan)
+        price_data_by_token = {}
+        for network, price_map in zip(networks, price_maps):
+            if isinstance(price_map, Exception):
+                logger.error(f"Auto-sell price fetch failed for {network}: {price_map}")
+                continue
+            
+            for token_address, price_data in price_map.items():
+                token = store.token_ids.get((network, token_address))
+                if price_data and token is not None:
+                    prices[token] = price_data['price_usd']
+                    price_data_by_token[token] = price_data
+        
+        now = datetime.utcnow()
+        trades = [
+            self._execute_auto_sell(slot, price_data_by_token[store.tokens[slot]], now)
+            for slot in store.triggered(prices).tolist()
+        ]
+        
+        if trades:
+            # Record all of this tick's trades with one write
+            await db.trades.insert_many(trades)
+            logger.info(f"Auto-sell triggered {len(trades)} strategies")
+        
+        return len(trades)
+    
+    def _execute_auto_sell(self, slot: int, price_data: Dict, now: datetime) -> Dict[str, Any]:
+        """Execute automatic sell order and return the trade record"""
+        store = self.strategies
+        network, token_address = store.token_keys[store.tokens[slot]]
         
         # In a real implementation, you would:
         # 1. Check user's token balance
@@ -609,32 +2685,899 @@ class AutoTradingService:
         # 4. Update user's portfolio
         
         # Update strategy
-        strategy['last_check'] = datetime.utcnow()
-        strategy['triggers_hit'] += 1
+        store.last_check[slot] = now.timestamp()
+        store.triggers_hit[slot] += 1
         
-        # Record the trade
-        await db.trades.insert_one({
+        return {
             'id': str(uuid.uuid4()),
-            'user_id': strategy['user_id'],
-            'token_address': config.token_address,
-            'network': config.network,
+            'user_id': store.user_keys[store.users[slot]],
+            'token_address': token_address,
+            'network': network,
             'action': 'auto_sell',
             'price': price_data['price_usd'],
             'amount': 0,  # Would calculate based on balance and percentage
-            'timestamp': datetime.utcnow(),
-            'strategy_id': strategy_id
-        })
+            'timestamp': now,
+            'strategy_id': store.strategy_ids[slot]
+        }
+
+# ============= DEPLOYMENT QUEUE =============
+class DeploymentQueue:
+    """Mongo-backed deployment jobs with leases, retries and per-network worker caps"""
+    
+    def __init__(self):
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self.workers_per_network = int(os.environ.get('DEPLOY_WORKERS_PER_NETWORK', '2'))
+        self.lease_seconds = float(os.environ.get('DEPLOY_LEASE_SECONDS', '120'))
+        self.max_attempts = int(os.environ.get('DEPLOY_MAX_ATTEMPTS', '5'))
+        self.retry_base_delay = float(os.environ.get('DEPLOY_RETRY_BASE_DELAY', '5'))
+        self.retry_max_delay = float(os.environ.get('DEPLOY_RETRY_MAX_DELAY', '300'))
+        self.poll_interval = float(os.environ.get('DEPLOY_POLL_INTERVAL', '2'))
+        self.running = False
+        self._tasks: List[asyncio.Task] = []
+        self._wakeups: Dict[str, asyncio.Event] = {}
+        # In-process processing metrics
+        self.processed = 0
+        self.failed = 0
+        self.retried = 0
+        self.processing_seconds = 0.0
+        self.max_processing_seconds = 0.0
+    
+    def _workers_for(self, network: str) -> int:
+        """Worker cap for a network, overridable with DEPLOY_WORKERS_<NETWORK>"""
+        return int(os.environ.get(f"DEPLOY_WORKERS_{network.upper()}", self.workers_per_network))
+    
+    def _new_job(self, token_id: str, network: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        now = datetime.utcnow()
+        return {
+            'id': str(uuid.uuid4()),
+            'token_id': token_id,
+            'network': network,
+            'payload': payload,
+            'status': 'queued',
+            'attempts': 0,
+            'run_at': now,
+            'lease_expires_at': None,
+            'worker_id': None,
+            'created_at': now,
+            'updated_at': now
+        }
+    
+    async def enqueue(self, token_id: str, network: str, payload: Dict[str, Any]) -> str:
+        """Queue a deployment job for a token"""
+        job = self._new_job(token_id, network, payload)
+        await db.deploy_jobs.insert_one(job)
+        self._wake(network)
+        return job['id']
+    
+    async def enqueue_many(self, jobs: List[Tuple[str, str, Dict[str, Any]]], batch_id: Optional[str] = None) -> List[str]:
+        """Queue many (token_id, network, payload) deployment jobs with one write"""
+        documents = [self._new_job(token_id, network, payload) for token_id, network, payload in jobs]
+        if batch_id:
+            for job in documents:
+                job['batch_id'] = batch_id
+        
+        await db.deploy_jobs.insert_many(documents)
+        
+        for network in {job['network'] for job in documents}:
+            self._wake(network)
+        return [job['id'] for job in documents]
+    
+    def _wake(self, network: str):
+        event = self._wakeups.get(network)
+        if event:
+            event.set()
+    
+    async def start(self):
+        """Recover orphaned deployments and start the workers"""
+        if self.running:
+            return
+        
+        self.running = True
+        
+        try:
+            await self.recover_orphans()
+        except Exception as e:
+            logger.error(f"Deployment recovery failed: {e}")
+        
+        for network in NETWORK_CONFIGS:
+            self._wakeups[network] = asyncio.Event()
+            for _ in range(self._workers_for(network)):
+                self._tasks.append(asyncio.create_task(self._worker(network)))
+    
+    async def stop(self):
+        """Stop the workers; their leased jobs are picked up again once the lease expires"""
+        self.running = False
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+    
+    async def recover_orphans(self) -> int:
+        """Queue jobs for tokens left in 'deploying' without a live job
+        
+        Runs under a lease, so workers starting together never queue the same token twice.
+        """
+        lease = MongoLease('deploy_recovery', self.lease_seconds)
+        if not await lease.try_acquire():
+            # Another worker is recovering right now
+            return 0
+        
+        try:
+            deploying = await db.tokens.find(
+                {'status': 'deploying'},
+                {'_id': 0, 'id': 1, 'network': 1, 'name': 1, 'symbol': 1, 'total_supply': 1, 'tax_rate': 1}
+            ).to_list(length=None)
+            if not deploying:
+                return 0
+            
+            live = await db.deploy_jobs.distinct(
+                'token_id',
+                {'token_id': {'$in': [t['id'] for t in deploying]}, 'status': {'$in': ['queued', 'running']}}
+            )
+            live = set(live)
+            
+            jobs = [
+                self._new_job(token['id'], token['network'], {
+                    'name': token['name'],
+                    'symbol': token['symbol'],
+                    'total_supply': token['total_supply'],
+                    'tax_rate': token.get('tax_rate', 5)
+                })
+                for token in deploying
+                if token['id'] not in live
+            ]
+            
+            if jobs:
+                await db.deploy_jobs.insert_many(jobs)
+                logger.info(f"Recovered {len(jobs)} orphaned deployments")
+            
+            return len(jobs)
+        finally:
+            await lease.release()
+    
+    async def _claim(self, network: str) -> Optional[Dict[str, Any]]:
+        """Lease the next due job for a network"""
+        from pymongo import ReturnDocument
+        
+        now = datetime.utcnow()
+        return await db.deploy_jobs.find_one_and_update(
+            {
+                'network': network,
+                'run_at': {'$lte': now},
+                '$or': [
+                    {'status': 'queued'},
+                    {'status': 'running', 'lease_expires_at': {'$lt': now}}
+                ]
+            },
+            {
+                '$set': {
+                    'status': 'running',
+                    'worker_id': self.worker_id,
+                    'lease_expires_at': now + timedelta(seconds=self.lease_seconds),
+                    'updated_at': now
+                },
+                '$inc': {'attempts': 1}
+            },
+            sort=[('run_at', 1)],
+            return_document=ReturnDocument.AFTER
+        )
+    
+    async def _worker(self, network: str):
+        """Claim and process jobs for one network"""
+        wakeup = self._wakeups[network]
+        
+        while self.running:
+            try:
+                job = await self._claim(network)
+            except Exception as e:
+                logger.error(f"Deployment queue error on {network}: {e}")
+                job = None
+            
+            if job is None:
+                wakeup.clear()
+                try:
+                    await asyncio.wait_for(wakeup.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            
+            await self._process(job)
+    
+    async def _renew_lease(self, job_id: str):
+        """Keep extending a job's lease while it is being processed"""
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+            try:
+                await db.deploy_jobs.update_one(
+                    {'id': job_id, 'worker_id': self.worker_id},
+                    {'$set': {'lease_expires_at': datetime.utcnow() + timedelta(seconds=self.lease_seconds)}}
+                )
+            except Exception as e:
+                # Keep beating; the next renewal may still land before the lease expires
+                logger.warning(f"Lease renewal failed for deployment job {job_id}: {e}")
+    
+    async def _process(self, job: Dict[str, Any]):
+        """Deploy a job's token and record the outcome"""
+        token_id = job['token_id']
+        network = job['network']
+        started = time.time()
+        heartbeat = asyncio.create_task(self._renew_lease(job['id']))
+        
+        try:
+            deployment_result = await blockchain_service.deploy_token(network, **job['payload'])
+            
+        except Exception as e:
+            # Bad requests will never succeed, everything else is retried with backoff
+            permanent = isinstance(e, HTTPException)
+            if not permanent and job['attempts'] < self.max_attempts:
+                delay = min(self.retry_base_delay * 2 ** (job['attempts'] - 1), self.retry_max_delay)
+                logger.warning(f"Token deployment attempt {job['attempts']} failed for {token_id}: {e}, retrying in {delay}s")
+                await db.deploy_jobs.update_one(
+                    {'id': job['id']},
+                    {'$set': {
+                        'status': 'queued',
+                        'run_at': datetime.utcnow() + timedelta(seconds=delay),
+                        'lease_expires_at': None,
+                        'error': str(e),
+                        'updated_at': datetime.utcnow()
+                    }}
+                )
+                self.retried += 1
+            else:
+                logger.error(f"Token deployment failed for {token_id}: {e}")
+                await db.deploy_jobs.update_one(
+                    {'id': job['id']},
+                    {'$set': {'status': 'failed', 'error': str(e), 'updated_at': datetime.utcnow()}}
+                )
+                # Update status to failed
+                await db.tokens.update_one(
+                    {'id': token_id},
+                    {'$set': {
+                        'status': 'failed',
+                        'error': str(e)
+                    }}
+                )
+                self.failed += 1
+            
+        else:
+            now = datetime.utcnow()
+            update = {
+                'contract_address': deployment_result['contract_address'],
+                'transaction_hash': deployment_result['transaction_hash'],
+                'deployer_address': deployment_result['deployer_address'],
+                'explorer_url': deployment_result['explorer_url']
+            }
+            if DEPLOY_SEND_TRANSACTIONS:
+                # Sent transactions stay 'confirming' until the receipt tracker sees them mined
+                update.update({'status': 'confirming', 'submitted_at': now})
+            else:
+                update.update({'status': 'deployed', 'deployed_at': now})
+            
+            # Update token with deployment results
+            await db.tokens.update_one({'id': token_id}, {'$set': update})
+            await db.deploy_jobs.update_one(
+                {'id': job['id']},
+                {'$set': {'status': 'done', 'updated_at': now}}
+            )
+            self.processed += 1
+            
+            if DEPLOY_SEND_TRANSACTIONS:
+                receipt_tracker.track(network, deployment_result['transaction_hash'], token_id, now)
+                logger.info(f"Token {token_id} deployment sent to {network}")
+            else:
+                logger.info(f"Token {token_id} deployed successfully to {network}")
+            
+        finally:
+            heartbeat.cancel()
+            elapsed = time.time() - started
+            self.processing_seconds += elapsed
+            self.max_processing_seconds = max(self.max_processing_seconds, elapsed)
+    
+    async def stats(self) -> Dict[str, Any]:
+        """Queue depth per network and status, plus processing times"""
+        depth = {}
+        async for row in db.deploy_jobs.aggregate([
+            {'$match': {'status': {'$in': ['queued', 'running']}}},
+            {'$group': {'_id': {'network': '$network', 'status': '$status'}, 'count': {'$sum': 1}}}
+        ]):
+            depth.setdefault(row['_id']['network'], {})[row['_id']['status']] = row['count']
+        
+        attempts = self.processed + self.failed + self.retried
+        return {
+            'depth': depth,
+            'processed': self.processed,
+            'failed': self.failed,
+            'retried': self.retried,
+            'avg_processing_seconds': self.processing_seconds / attempts if attempts else 0.0,
+            'max_processing_seconds': self.max_processing_seconds
+        }
+
+# ============= RECEIPT TRACKER =============
+class ReceiptTracker:
+    """Confirms sent deployments by polling every pending receipt of a network once per new block"""
+    
+    def __init__(self, blockchain_service: BlockchainService):
+        self.blockchain_service = blockchain_service
+        self.confirmations = int(os.environ.get('DEPLOY_CONFIRMATIONS', '1'))
+        self.batch_size = int(os.environ.get('RECEIPT_BATCH_SIZE', '500'))
+        # Deployments not mined within this many seconds are marked failed
+        self.timeout = float(os.environ.get('RECEIPT_TIMEOUT', '1800'))
+        self.sync_interval = float(os.environ.get('RECEIPT_SYNC_INTERVAL', '10'))
+        # Only the lease holder polls receipts, so RPC calls per block do not grow with workers
+        self.lease = MongoLease(
+            'receipt_tracker',
+            float(os.environ.get('RECEIPT_LEASE_SECONDS', str(max(3 * self.sync_interval, 30))))
+        )
+        # network -> transaction hash -> (token id, submitted_at)
+        self.pending: Dict[str, Dict[str, Tuple[str, datetime]]] = {}
+        self.confirmed = 0
+        self.reverted = 0
+        self.dropped = 0
+        self.running = False
+        self._task: Optional[asyncio.Task] = None
+        blockchain_service.head_watcher.add_listener(self.on_block)
+    
+    def track(self, network: str, tx_hash: str, token_id: str, submitted_at: datetime):
+        """Wait for a deployment transaction's receipt"""
+        self.pending.setdefault(network, {})[tx_hash] = (token_id, submitted_at)
+        self.blockchain_service.head_watcher.watch(network)
+    
+    async def start(self):
+        """Start syncing 'confirming' deployments whenever this worker holds the tracker lease"""
+        if self.running:
+            return
+        
+        self.running = True
+        self._task = asyncio.create_task(self._run())
+    
+    async def stop(self):
+        """Stop tracking and hand the lease to another worker"""
+        self.running = False
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        await self.lease.release()
+    
+    async def _run(self):
+        while self.running:
+            try:
+                if await self.lease.try_acquire():
+                    await self.sync()
+                else:
+                    # The lease holder picks this worker's deployments up from the database
+                    self.pending.clear()
+            except Exception as e:
+                logger.error(f"Receipt tracker sync failed: {e}")
+            
+            await asyncio.sleep(self.sync_interval)
+    
+    async def sync(self):
+        """Track every deployment left 'confirming', whichever worker or run sent it"""
+        async for token in db.tokens.find(
+            {'status': 'confirming'},
+            {'_id': 0, 'id': 1, 'network': 1, 'transaction_hash': 1, 'submitted_at': 1}
+        ):
+            self.track(token['network'], token['transaction_hash'], token['id'], token.get('submitted_at') or datetime.utcnow())
+    
+    async def on_block(self, network: str, head: int):
+        """Fetch all pending receipts of a network in batches and record the outcomes in bulk"""
+        from eth_utils import to_checksum_address
+        from pymongo import UpdateOne
+        
+        if not self.lease.held:
+            return
+        
+        pending = self.pending.get(network)
+        if not pending:
+            return
+        
+        pool = self.blockchain_service.get_rpc_pool(network)
+        tx_hashes = list(pending)
+        batches = await asyncio.gather(*(
+            pool.batch([('eth_getTransactionReceipt', [tx_hash]) for tx_hash in tx_hashes[start:start + self.batch_size]])
+            for start in range(0, len(tx_hashes), self.batch_size)
+        ))
+        responses = [response for batch in batches for response in batch]
+        
+        now = datetime.utcnow()
+        updates = []
+        for tx_hash, response in zip(tx_hashes, responses):
+            token_id, submitted_at = pending[tx_hash]
+            receipt = response.get('result')
+            
+            if receipt is None:
+                if 'result' in response and now - submitted_at > timedelta(seconds=self.timeout):
+                    del pending[tx_hash]
+                    self.dropped += 1
+                    updates.append(UpdateOne(
+                        {'id': token_id, 'status': 'confirming'},
+                        {'$set': {'status': 'failed', 'error': 'Deployment transaction was not mined'}}
+                    ))
+                continue
+            
+            block_number = int(receipt['blockNumber'], 16)
+            if head - block_number + 1 < self.confirmations:
+                continue
+            
+            del pending[tx_hash]
+            if int(receipt['status'], 16) == 1:
+                self.confirmed += 1
+                contract_address = to_checksum_address(receipt['contractAddress'])
+                updates.append(UpdateOne(
+                    {'id': token_id, 'status': 'confirming'},
+                    {'$set': {
+                        'status': 'deployed',
+                        'contract_address': contract_address,
+                        'explorer_url': f"{NETWORK_CONFIGS[network]['explorer']}/address/{contract_address}",
+                        'block_number': block_number,
+                        'gas_used': int(receipt['gasUsed'], 16),
+                        'deployed_at': now
+                    }}
+                ))
+            else:
+                self.reverted += 1
+                updates.append(UpdateOne(
+                    {'id': token_id, 'status': 'confirming'},
+                    {'$set': {'status': 'failed', 'error': 'Deployment transaction reverted', 'block_number': block_number}}
+                ))
+        
+        if updates:
+            await db.tokens.bulk_write(updates, ordered=False)
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'pending': {network: len(pending) for network, pending in self.pending.items()},
+            'confirmed': self.confirmed,
+            'reverted': self.reverted,
+            'dropped': self.dropped
+        }
+
+# ============= PRICE BROADCAST HUB =============
+class PriceSubscriber:
+    """Outbound queue for one WebSocket; the oldest updates are dropped when the client falls behind"""
+    __slots__ = ('queue', 'dropped')
+    
+    def __init__(self, max_pending: int):
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_pending)
+        self.dropped = 0
+    
+    def push(self, message: str):
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(message)
+
+class PriceHub:
+    """One polling producer per (network, token) fanning pre-serialized updates out to subscribers"""
+    
+    def __init__(self, price_service: 'PriceService', interval: float):
+        self.price_service = price_service
+        self.interval = interval
+        self._subscribers: Dict[Tuple[str, str], set] = {}
+        self._producers: Dict[Tuple[str, str], asyncio.Task] = {}
+        self._latest: Dict[Tuple[str, str], str] = {}
+    
+    def subscribe(self, subscriber: PriceSubscriber, network: str, token_address: str):
+        """Add a subscriber, starting the token's producer if it is the first"""
+        key = (network, token_address)
+        self._subscribers.setdefault(key, set()).add(subscriber)
+        
+        if key not in self._producers:
+            self._producers[key] = asyncio.create_task(self._produce(key))
+        elif key in self._latest:
+            # Late joiners get the last update right away instead of waiting a tick
+            subscriber.push(self._latest[key])
+    
+    def unsubscribe(self, subscriber: PriceSubscriber, network: str, token_address: str):
+        """Remove a subscriber, stopping the producer when nobody is left"""
+        key = (network, token_address)
+        subscribers = self._subscribers.get(key)
+        if not subscribers:
+            return
+        
+        subscribers.discard(subscriber)
+        if not subscribers:
+            del self._subscribers[key]
+            self._latest.pop(key, None)
+            producer = self._producers.pop(key, None)
+            if producer:
+                producer.cancel()
+    
+    async def _produce(self, key: Tuple[str, str]):
+        """Fetch one price per tick and fan it out"""
+        network, token_address = key
+        
+        while True:
+            try:
+                price_data = await self.price_service.get_token_price(token_address, network)
+                
+                if price_data:
+                    # Serialize once for every subscriber
+                    message = json.dumps({
+                        'token_address': token_address,
+                        'network': network,
+                        'price_data': price_data,
+                        'timestamp': datetime.utcnow().isoformat()
+                    })
+                    self._latest[key] = message
+                    for subscriber in list(self._subscribers.get(key, ())):
+                        subscriber.push(message)
+            
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Price hub error for {network}:{token_address}: {e}")
+            
+            await asyncio.sleep(self.interval)
+    
+    def stats(self) -> Dict[str, int]:
+        """Get producer and subscription counts"""
+        return {
+            'producers': len(self._producers),
+            'subscriptions': sum(len(subscribers) for subscribers in self._subscribers.values())
+        }
+
+# ============= DASHBOARD STATS =============
+class DashboardStats:
+    """Dashboard counters materialized in the stats collection and refreshed on a short TTL"""
+    
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._refresh_task: Optional[asyncio.Task] = None
+    
+    async def get(self) -> Dict[str, Any]:
+        """Get the materialized stats, refreshing them in the background once stale"""
+        stats = await db.stats.find_one({'_id': 'dashboard'})
+        if stats is None:
+            return await self.refresh()
+        
+        if (datetime.utcnow() - stats['computed_at']).total_seconds() >= self.ttl:
+            self._start_refresh()
+        return stats
+    
+    async def refresh(self) -> Dict[str, Any]:
+        """Recompute the stats, sharing one computation between concurrent callers"""
+        self._start_refresh()
+        return await asyncio.shield(self._refresh_task)
+    
+    def _start_refresh(self):
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.create_task(self._compute())
+    
+    async def _compute(self) -> Dict[str, Any]:
+        """Count everything with one $facet over tokens plus two cheap counts, run concurrently"""
+        token_facets, active_strategies, total_trades = await asyncio.gather(
+            db.tokens.aggregate([
+                {'$facet': {
+                    'total': [{'$count': 'count'}],
+                    'by_network': [
+                        {'$group': {'_id': {'network': '$network', 'status': '$status'}, 'count': {'$sum': 1}}}
+                    ]
+                }}
+            ]).to_list(length=1),
+            db.auto_sell_configs.count_documents({'enabled': True}),
+            db.trades.estimated_document_count()
+        )
+        
+        facets = token_facets[0] if token_facets else {}
+        networks = {}
+        deployed_tokens = 0
+        for row in facets.get('by_network', []):
+            network_stats = networks.setdefault(row['_id'].get('network'), {'total': 0})
+            network_stats[row['_id'].get('status')] = row['count']
+            network_stats['total'] += row['count']
+            if row['_id'].get('status') == 'deployed':
+                deployed_tokens += row['count']
+        
+        total = facets.get('total')
+        stats = {
+            '_id': 'dashboard',
+            'total_tokens': total[0]['count'] if total else 0,
+            'deployed_tokens': deployed_tokens,
+            'active_strategies': active_strategies,
+            'total_trades': total_trades,
+            'networks': networks,
+            'computed_at': datetime.utcnow()
+        }
+        
+        await db.stats.replace_one({'_id': 'dashboard'}, stats, upsert=True)
+        return stats
+
+# ============= DATABASE INDEXES =============
+# Fields read by TokenResponse, used as the projection for token reads
+TOKEN_RESPONSE_PROJECTION = {
+    '_id': 0, 'id': 1, 'name': 1, 'symbol': 1, 'contract_address': 1, 'network': 1,
+    'total_supply': 1, 'created_at': 1, 'status': 1, 'transaction_hash': 1, 'explorer_url': 1
+}
+
+async def ensure_indexes():
+    """Create the indexes used by hot queries (safe to run on every startup)"""
+    from pymongo import ASCENDING, DESCENDING, IndexModel
+    
+    await db.tokens.create_indexes([
+        IndexModel([('id', ASCENDING)], unique=True),
+        IndexModel([('created_at', DESCENDING), ('id', DESCENDING)]),
+        IndexModel([('status', ASCENDING), ('network', ASCENDING)]),
+        IndexModel([('batch_id', ASCENDING)], sparse=True)
+    ])
+    await db.auto_sell_configs.create_indexes([
+        IndexModel([('id', ASCENDING)], unique=True),
+        IndexModel([('enabled', ASCENDING), ('created_at', DESCENDING)]),
+        IndexModel([('created_at', ASCENDING)]),
+        IndexModel([('updated_at', ASCENDING)])
+    ])
+    await db.trades.create_indexes([
+        IndexModel([('id', ASCENDING)], unique=True),
+        IndexModel([('timestamp', DESCENDING), ('id', DESCENDING)])
+    ])
+    await db.deploy_jobs.create_indexes([
+        IndexModel([('id', ASCENDING)], unique=True),
+        IndexModel([('network', ASCENDING), ('status', ASCENDING), ('run_at', ASCENDING)]),
+        IndexModel([('token_id', ASCENDING)])
+    ])
+    await db.deployer_keys.create_indexes([
+        IndexModel([('address', ASCENDING)], unique=True)
+    ])
+    await db.transfers.create_indexes([
+        IndexModel([('network', ASCENDING), ('position', ASCENDING)]),
+        IndexModel([('network', ASCENDING), ('token', ASCENDING), ('position', DESCENDING)])
+    ])
+    await db.approvals.create_indexes([
+        IndexModel([('network', ASCENDING), ('position', ASCENDING)]),
+        IndexModel([('network', ASCENDING), ('token', ASCENDING), ('owner', ASCENDING), ('position', DESCENDING)])
+    ])
+    await db.balances.create_indexes([
+        IndexModel([('network', ASCENDING), ('token', ASCENDING), ('balance', DESCENDING)])
+    ])
 
 # ============= INITIALIZE SERVICES =============
 blockchain_service = BlockchainService()
+token_reader = TokenReader(blockchain_service)
+transfer_indexer = TransferIndexer(blockchain_service, INDEXER_NETWORKS)
 price_service = PriceService()
-auto_trading_service = AutoTradingService()
+auto_trading_service = AutoTradingService(price_service)
+deployment_queue = DeploymentQueue()
+receipt_tracker = ReceiptTracker(blockchain_service)
+price_hub = PriceHub(price_service, float(os.environ.get('PRICE_FEED_INTERVAL', '5')))
+dashboard_stats = DashboardStats(float(os.environ.get('DASHBOARD_STATS_TTL', '10')))
 
 # Start auto-trading monitoring in background
 @app.on_event("startup")
 async def startup_event():
+    try:
+        await ensure_indexes()
+    except Exception as e:
+        logger.error(f"Index creation failed: {e}")
+    await price_service.start()
+    asyncio.create_task(blockchain_service.monitor_connections())
+    asyncio.create_task(blockchain_service.warm_contract())
+    blockchain_service.key_pool.start()
+    await receipt_tracker.start()
+    await deployment_queue.start()
+    transfer_indexer.start()
     asyncio.create_task(auto_trading_service.monitor_auto_sell())
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    await deployment_queue.stop()
+    await receipt_tracker.stop()
+    await transfer_indexer.stop()
+    await auto_trading_service.stop()
+    await blockchain_service.close()
+    await price_service.close()
+    BLOCKCHAIN_EXECUTOR.shutdown(wait=False)
+
+# ============= TOKEN HELPERS =============
+def generate_best_token_request(network: str) -> TokenCreationRequest:
+    """Generate optimal memecoin parameters"""
+    import random
+    
+    # Fun memecoin names and symbols
+    names = [
+        "MoonDoge", "SafeRocket", "DiamondHands", "ToTheMoon", "ShibaInu2",
+        "FlokiMusk", "DogeKiller", "SafeMoon2", "BabyDoge", "PepeCoin",
+        "WagmiCoin", "HodlToken", "MemeLord", "CryptoMeme", "MemeKing"
+    ]
+    
+    symbols = [
+        "MDOGE", "SROCKET", "DIAMOND", "MOON", "SHIB2",
+        "FLOKI", "DOGEK", "SAFE2", "BABYDOGE", "PEPE",
+        "WAGMI", "HODL", "MLORD", "CMEME", "MKING"
+    ]
+    
+    # Select random name/symbol pair
+    idx = random.randint(0, len(names) - 1)
+    name = names[idx]
+    symbol = symbols[idx]
+    
+    # Optimal parameters for memecoin success
+    total_supply = random.choice([100000000, 420690000, 1000000000, 69000000])  # Meme numbers
+    tax_rate = random.choice([3, 5, 7])  # Low to moderate tax
+    
+    # Use provided network or default to BSC (cheapest)
+    network = network if network in NETWORK_CONFIGS else 'bsc_testnet'
+    
+    return TokenCreationRequest(
+        name=name,
+        symbol=symbol,
+        total_supply=total_supply,
+        network=network,
+        tax_rate=tax_rate
+    )
+
+def new_token_document(request: TokenCreationRequest, batch_id: Optional[str] = None) -> Dict[str, Any]:
+    """Build the pending token document stored before deployment"""
+    token_data = {
+        'id': str(uuid.uuid4()),
+        'name': request.name,
+        'symbol': request.symbol,
+        'total_supply': request.total_supply,
+        'network': request.network,
+        'tax_rate': request.tax_rate,
+        'status': 'deploying',
+        'created_at': datetime.utcnow(),
+        'contract_address': None,
+        'transaction_hash': None
+    }
+    if batch_id:
+        token_data['batch_id'] = batch_id
+    return token_data
+
+def deployment_payload(token_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Arguments passed to BlockchainService.deploy_token for a token"""
+    return {
+        'name': token_data['name'],
+        'symbol': token_data['symbol'],
+        'total_supply': token_data['total_supply'],
+        'tax_rate': token_data['tax_rate']
+    }
+
+def pending_token_response(token_data: Dict[str, Any]) -> TokenResponse:
+    """Response for a token that was just queued for deployment"""
+    return TokenResponse(
+        id=token_data['id'],
+        name=token_data['name'],
+        symbol=token_data['symbol'],
+        contract_address=None,
+        network=token_data['network'],
+        total_supply=token_data['total_supply'],
+        created_at=token_data['created_at'],
+        status="deploying",
+        transaction_hash=None,
+        explorer_url=None
+    )
+
+# ============= PAGINATION =============
+# Upper bound on any page size a client can request
+MAX_PAGE_SIZE = int(os.environ.get('MAX_PAGE_SIZE', '200'))
+
+def encode_cursor(sort_value: datetime, item_id: str) -> str:
+    """Opaque cursor pointing just past an item"""
+    raw = json.dumps([sort_value.isoformat(), item_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+def decode_cursor(cursor: str) -> Tuple[datetime, str]:
+    """Decode a cursor produced by encode_cursor"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        sort_value, item_id = json.loads(base64.urlsafe_b64decode(padded))
+        return datetime.fromisoformat(sort_value), str(item_id)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+async def fetch_page(
+    collection,
+    sort_field: str,
+    projection: Dict[str, int],
+    limit: int,
+    cursor: Optional[str],
+    response: Response
+) -> List[Dict[str, Any]]:
+    """Newest-first keyset page on (sort_field, id); sets X-Next-Cursor when more remain"""
+    limit = min(limit, MAX_PAGE_SIZE)
+    query = {}
+    
+    if cursor:
+        sort_value, item_id = decode_cursor(cursor)
+        query = {'$or': [
+            {sort_field: {'$lt': sort_value}},
+            {sort_field: sort_value, 'id': {'$lt': item_id}}
+        ]}
+    
+    # Fetch one extra row to know whether another page exists
+    items = await collection.find(query, projection).sort(
+        [(sort_field, -1), ('id', -1)]
+    ).limit(limit + 1).to_list(length=limit + 1)
+    
+    if len(items) > limit:
+        items = items[:limit]
+        response.headers['X-Next-Cursor'] = encode_cursor(items[-1][sort_field], items[-1]['id'])
+    
+    return items
+
+# ============= EXPORTS =============
+EXPORT_BATCH_SIZE = int(os.environ.get('EXPORT_BATCH_SIZE', '1000'))
+
+# Exportable datasets: collection name, time field used for range filters, exported columns
+EXPORT_DATASETS = {
+    'tokens': ('tokens', 'created_at', [
+        'id', 'name', 'symbol', 'network', 'total_supply', 'tax_rate', 'status', 'contract_address',
+        'transaction_hash', 'deployer_address', 'explorer_url', 'batch_id', 'created_at', 'deployed_at'
+    ]),
+    'trades': ('trades', 'timestamp', [
+        'id', 'user_id', 'token_address', 'network', 'action', 'price', 'amount', 'strategy_id', 'timestamp'
+    ]),
+    'strategies': ('auto_sell_configs', 'created_at', [
+        'id', 'user_id', 'token_address', 'network', 'trigger_price', 'sell_percentage', 'enabled', 'created_at'
+    ])
+}
+
+def _export_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+def _encode_ndjson(rows: List[Dict[str, Any]], fields: List[str]) -> str:
+    return ''.join(
+        json.dumps({field: _export_value(row.get(field)) for field in fields}) + '\n'
+        for row in rows
+    )
+
+def _encode_csv(rows: List[Dict[str, Any]], fields: List[str]) -> str:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow(['' if row.get(field) is None else _export_value(row.get(field)) for field in fields])
+    return buffer.getvalue()
+
+async def stream_export(
+    dataset: str,
+    export_format: str,
+    compress: bool,
+    since: Optional[datetime],
+    until: Optional[datetime]
+):
+    """Yield an export one cursor batch at a time so memory stays flat"""
+    collection_name, time_field, fields = EXPORT_DATASETS[dataset]
+    encode = _encode_csv if export_format == 'csv' else _encode_ndjson
+    # wbits=31 writes a gzip container
+    compressor = zlib.compressobj(wbits=31) if compress else None
+    
+    query = {}
+    if since or until:
+        query[time_field] = {}
+        if since:
+            query[time_field]['$gte'] = since
+        if until:
+            query[time_field]['$lt'] = until
+    
+    projection = {'_id': 0, **{field: 1 for field in fields}}
+    cursor = db[collection_name].find(query, projection).sort(time_field, 1).batch_size(EXPORT_BATCH_SIZE)
+    
+    def emit(text: str) -> bytes:
+        data = text.encode()
+        return compressor.compress(data) if compressor else data
+    
+    if export_format == 'csv':
+        header = io.StringIO()
+        csv.writer(header).writerow(fields)
+        yield emit(header.getvalue())
+    
+    rows = []
+    async for row in cursor:
+        rows.append(row)
+        if len(rows) >= EXPORT_BATCH_SIZE:
+            chunk = emit(encode(rows, fields))
+            rows = []
+            if chunk:
+                yield chunk
+    
+    if rows:
+        yield emit(encode(rows, fields))
+    if compressor:
+        yield compressor.flush()
+
 # ============= API ENDPOINTS =============
 
 @app.get("/api/")
@@ -646,111 +3589,99 @@ async def health_check():
     return {
         "status": "healthy",
         "networks": list(NETWORK_CONFIGS.keys()),
+        "rpc_status": blockchain_service.network_status,
+        "price_cache": price_service.price_cache.stats(),
+        "deployer_pool": len(blockchain_service.key_pool),
         "timestamp": datetime.utcnow().isoformat()
     }
 
 @app.post("/api/tokens/create", response_model=TokenResponse)
-async def create_token(request: TokenCreationRequest, background_tasks: BackgroundTasks):
+async def create_token(request: TokenCreationRequest):
     """Create a new memecoin"""
     try:
-        # Generate token ID
-        token_id = str(uuid.uuid4())
-        
         # Store in database as pending
-        token_data = {
-            'id': token_id,
-            'name': request.name,
-            'symbol': request.symbol,
-            'total_supply': request.total_supply,
-            'network': request.network,
-            'tax_rate': request.tax_rate,
-            'status': 'deploying',
-            'created_at': datetime.utcnow(),
-            'contract_address': None,
-            'transaction_hash': None
-        }
+        token_data = new_token_document(request)
         
         await db.tokens.insert_one(token_data)
         
-        # Deploy in background
-        background_tasks.add_task(
-            deploy_token_background, 
-            token_id, 
-            request.network,
-            request.name, 
-            request.symbol, 
-            request.total_supply,
-            request.tax_rate
-        )
+        # Queue the deployment for the workers
+        await deployment_queue.enqueue(token_data['id'], request.network, deployment_payload(token_data))
         
-        return TokenResponse(
-            id=token_id,
-            name=request.name,
-            symbol=request.symbol,
-            contract_address=None,
-            network=request.network,
-            total_supply=request.total_supply,
-            created_at=token_data['created_at'],
-            status="deploying",
-            transaction_hash=None,
-            explorer_url=None
-        )
+        return pending_token_response(token_data)
         
     except Exception as e:
         logger.error(f"Token creation error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/api/tokens/create-best", response_model=TokenResponse)
-async def create_best_memecoin(request: AutoTokenRequest, background_tasks: BackgroundTasks):
+async def create_best_memecoin(request: AutoTokenRequest):
     """Create the best memecoin automatically with optimal parameters"""
     try:
-        # Generate optimal memecoin parameters
-        import random
+        return await create_token(generate_best_token_request(request.network))
         
-        # Fun memecoin names and symbols
-        names = [
-            "MoonDoge", "SafeRocket", "DiamondHands", "ToTheMoon", "ShibaInu2",
-            "FlokiMusk", "DogeKiller", "SafeMoon2", "BabyDoge", "PepeCoin",
-            "WagmiCoin", "HodlToken", "MemeLord", "CryptoMeme", "MemeKing"
-        ]
+    except Exception as e:
+        logger.error(f"Auto token creation error: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/api/tokens/create-batch", response_model=TokenBatchResponse)
+async def create_token_batch(request: TokenBatchRequest):
+    """Create many memecoins with one insert and one queue write"""
+    # Check the size before generating anything
+    size = len(request.tokens) + request.count
+    if not size:
+        raise HTTPException(status_code=400, detail="Batch is empty")
+    if size > TOKEN_BATCH_MAX:
+        raise HTTPException(status_code=400, detail=f"Batch exceeds {TOKEN_BATCH_MAX} tokens")
+    
+    requests = request.tokens + [
+        generate_best_token_request(request.network) for _ in range(request.count)
+    ]
+    
+    try:
+        batch_id = str(uuid.uuid4())
+        tokens = [new_token_document(token_request, batch_id) for token_request in requests]
         
-        symbols = [
-            "MDOGE", "SROCKET", "DIAMOND", "MOON", "SHIB2",
-            "FLOKI", "DOGEK", "SAFE2", "BABYDOGE", "PEPE",
-            "WAGMI", "HODL", "MLORD", "CMEME", "MKING"
-        ]
+        # insert_many mutates the documents with _id, so build the responses first
+        responses = [pending_token_response(token_data) for token_data in tokens]
         
-        # Select random name/symbol pair
-        idx = random.randint(0, len(names) - 1)
-        name = names[idx]
-        symbol = symbols[idx]
-        
-        # Optimal parameters for memecoin success
-        total_supply = random.choice([100000000, 420690000, 1000000000, 69000000])  # Meme numbers
-        tax_rate = random.choice([3, 5, 7])  # Low to moderate tax
-        
-        # Use provided network or default to BSC (cheapest)
-        network = request.network if request.network in NETWORK_CONFIGS else 'bsc_testnet'
-        
-        # Create token
-        token_request = TokenCreationRequest(
-            name=name,
-            symbol=symbol,
-            total_supply=total_supply,
-            network=network,
-            tax_rate=tax_rate
-        )
+        await db.tokens.insert_many(tokens)
+        
+        await deployment_queue.enqueue_many([
+            (token_data['id'], token_data['network'], deployment_payload(token_data))
+            for token_data in tokens
+        ], batch_id)
         
-        return await create_token(token_request, background_tasks)
+        return TokenBatchResponse(batch_id=batch_id, tokens=responses)
         
     except Exception as e:
-        logger.error(f"Auto token creation error: {e}")
+        logger.error(f"Batch token creation error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/api/tokens/batches/{batch_id}")
+async def get_token_batch(batch_id: str):
+    """Get deployment progress for a token batch"""
+    status_counts = {}
+    async for row in db.tokens.aggregate([
+        {'$match': {'batch_id': batch_id}},
+        {'$group': {'_id': '$status', 'count': {'$sum': 1}}}
+    ]):
+        status_counts[row['_id']] = row['count']
+    
+    if not status_counts:
+        raise HTTPException(status_code=404, detail="Batch not found")
+    
+    total = sum(status_counts.values())
+    return {
+        'batch_id': batch_id,
+        'total': total,
+        'status_counts': status_counts,
+        'complete': status_counts.get('deploying', 0) + status_counts.get('confirming', 0) == 0
+    }
+
 @app.get("/api/tokens/{token_id}", response_model=TokenResponse)
 async def get_token(token_id: str):
     """Get token information"""
-    token = await db.tokens.find_one({'id': token_id})
+    token = await db.tokens.find_one({'id': token_id}, TOKEN_RESPONSE_PROJECTION)
     if not token:
         raise HTTPException(status_code=404, detail="Token not found")
     
@@ -768,9 +3699,9 @@ async def get_token(token_id: str):
     )
 
 @app.get("/api/tokens", response_model=List[TokenResponse])
-async def list_tokens(limit: int = 50):
-    """List all tokens"""
-    tokens = await db.tokens.find().sort('created_at', -1).limit(limit).to_list(length=None)
+async def list_tokens(response: Response, limit: int = Query(50, ge=1), cursor: Optional[str] = None):
+    """List tokens newest first; pass X-Next-Cursor back as cursor for the next page"""
+    tokens = await fetch_page(db.tokens, 'created_at', TOKEN_RESPONSE_PROJECTION, limit, cursor, response)
     
     return [
         TokenResponse(
@@ -788,10 +3719,119 @@ async def list_tokens(limit: int = 50):
         for token in tokens
     ]
 
+@app.get("/api/trades")
+async def list_trades(response: Response, limit: int = Query(50, ge=1), cursor: Optional[str] = None):
+    """List trades newest first; pass X-Next-Cursor back as cursor for the next page"""
+    trades = await fetch_page(
+        db.trades,
+        'timestamp',
+        {'_id': 0, 'id': 1, 'user_id': 1, 'token_address': 1, 'network': 1, 'action': 1,
+         'price': 1, 'amount': 1, 'timestamp': 1, 'strategy_id': 1},
+        limit,
+        cursor,
+        response
+    )
+    
+    return [
+        {
+            'id': trade['id'],
+            'token_address': trade['token_address'],
+            'network': trade['network'],
+            'action': trade['action'],
+            'price': trade['price'],
+            'amount': trade.get('amount'),
+            'strategy_id': trade.get('strategy_id'),
+            'timestamp': trade['timestamp'].isoformat()
+        }
+        for trade in trades
+    ]
+
+@app.get("/api/export/{dataset}")
+async def export_dataset(
+    dataset: str,
+    format: str = Query('ndjson', pattern='^(ndjson|csv)$'),
+    gzip: bool = False,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None
+):
+    """Stream a full dataset export (tokens, trades or strategies) as NDJSON or CSV"""
+    if dataset not in EXPORT_DATASETS:
+        raise HTTPException(status_code=404, detail=f"Unknown dataset: {dataset}")
+    
+    filename = f"{dataset}.{format}"
+    media_type = 'text/csv' if format == 'csv' else 'application/x-ndjson'
+    if gzip:
+        filename += '.gz'
+        media_type = 'application/gzip'
+    
+    return StreamingResponse(
+        stream_export(dataset, format, gzip, since, until),
+        media_type=media_type,
+        headers={'Content-Disposition': f'attachment; filename="{filename}"'}
+    )
+
+@app.post("/api/tokens/refresh-onchain")
+async def refresh_onchain_tokens(network: Optional[str] = None):
+    """Re-read name, symbol, supply, tax rate and deployer balance of deployed tokens"""
+    if network and network not in NETWORK_CONFIGS:
+        raise HTTPException(status_code=400, detail=f"Unsupported network: {network}")
+    
+    try:
+        return await token_reader.refresh_tokens(network)
+        
+    except Exception as e:
+        logger.error(f"On-chain refresh error: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/api/tokens/{token_id}/holders")
+async def get_token_holders(token_id: str, limit: int = Query(default=20, ge=1, le=MAX_PAGE_SIZE)):
+    """Get holder count, top holders and transfer totals from the transfer index"""
+    token = await db.tokens.find_one({'id': token_id}, {'_id': 0, 'contract_address': 1, 'network': 1})
+    if not token:
+        raise HTTPException(status_code=404, detail="Token not found")
+    
+    if not token.get('contract_address'):
+        raise HTTPException(status_code=400, detail="Token not yet deployed")
+    
+    from bson.decimal128 import Decimal128
+    
+    key = {'network': token['network'], 'token': token['contract_address'].lower()}
+    holders_query = {**key, 'balance': {'$gt': Decimal128('0')}}
+    
+    async def transfer_totals():
+        async for row in db.transfers.aggregate([
+            {'$match': key},
+            {'$group': {
+                '_id': None,
+                'transfers': {'$sum': 1},
+                'volume': {'$sum': '$value'},
+                'tax_collected': {'$sum': {'$cond': ['$tax', '$value', 0]}}
+            }}
+        ]):
+            return row
+        return {}
+    
+    holder_count, top_holders, totals = await asyncio.gather(
+        db.balances.count_documents(holders_query),
+        db.balances.find(holders_query, {'_id': 0, 'holder': 1, 'balance': 1}).sort('balance', -1).limit(limit).to_list(limit),
+        transfer_totals()
+    )
+    
+    return {
+        'token_id': token_id,
+        'contract_address': token['contract_address'],
+        'network': token['network'],
+        'holders': holder_count,
+        'top_holders': [{'holder': row['holder'], 'balance': str(row['balance'])} for row in top_holders],
+        'transfers': totals.get('transfers', 0),
+        'volume': str(totals.get('volume', 0)),
+        'tax_collected': str(totals.get('tax_collected', 0))
+    }
+
 @app.get("/api/tokens/{token_id}/price")
 async def get_token_price(token_id: str):
     """Get current token price"""
-    token = await db.tokens.find_one({'id': token_id})
+    token = await db.tokens.find_one({'id': token_id}, {'_id': 0, 'contract_address': 1, 'network': 1})
     if not token:
         raise HTTPException(status_code=404, detail="Token not found")
     
@@ -836,7 +3876,10 @@ async def setup_auto_sell(config: AutoSellConfig):
 @app.get("/api/trading/strategies")
 async def get_trading_strategies():
     """Get active trading strategies"""
-    strategies = await db.auto_sell_configs.find({'enabled': True}).to_list(length=None)
+    strategies = await db.auto_sell_configs.find(
+        {'enabled': True},
+        {'_id': 0, 'id': 1, 'token_address': 1, 'network': 1, 'trigger_price': 1, 'sell_percentage': 1, 'created_at': 1}
+    ).to_list(length=None)
     
     return {
         'active_strategies': len(strategies),
@@ -853,31 +3896,46 @@ async def get_trading_strategies():
         ]
     }
 
+@app.get("/api/metrics")
+async def get_metrics():
+    """Get service metrics"""
+    return {
+        'deploy_queue': await deployment_queue.stats(),
+        'price_cache': price_service.price_cache.stats(),
+        'price_hub': price_hub.stats(),
+        'transfer_indexer': transfer_indexer.stats(),
+        'gas': blockchain_service.gas_oracle.stats(),
+        'receipts': receipt_tracker.stats(),
+        'token_reader': {'rpc_requests': token_reader.rpc_requests, 'calls': token_reader.calls},
+        'rpc': {network: pool.stats() for network, pool in blockchain_service.rpc_pools.items()},
+        'auto_sell_strategies': len(auto_trading_service.strategies),
+        'deployer_pool': len(blockchain_service.key_pool),
+        'timestamp': datetime.utcnow().isoformat()
+    }
+
 @app.get("/api/dashboard")
 async def get_dashboard():
     """Get dashboard data"""
     try:
-        # Get total tokens created
-        total_tokens = await db.tokens.count_documents({})
-        
-        # Get deployed tokens
-        deployed_tokens = await db.tokens.count_documents({'status': 'deployed'})
-        
-        # Get recent tokens
-        recent_tokens = await db.tokens.find().sort('created_at', -1).limit(5).to_list(length=None)
-        
-        # Get active strategies
-        active_strategies = await db.auto_sell_configs.count_documents({'enabled': True})
-        
-        # Get recent trades
-        recent_trades = await db.trades.find().sort('timestamp', -1).limit(10).to_list(length=None)
+        # Stats document, recent tokens and recent trades are fetched concurrently
+        stats, recent_tokens, recent_trades = await asyncio.gather(
+            dashboard_stats.get(),
+            db.tokens.find(
+                {}, {'_id': 0, 'id': 1, 'name': 1, 'symbol': 1, 'network': 1, 'status': 1, 'created_at': 1}
+            ).sort('created_at', -1).limit(5).to_list(length=None),
+            db.trades.find(
+                {}, {'_id': 0, 'id': 1, 'token_address': 1, 'network': 1, 'action': 1, 'price': 1, 'timestamp': 1}
+            ).sort('timestamp', -1).limit(10).to_list(length=None)
+        )
         
         return {
             'stats': {
-                'total_tokens': total_tokens,
-                'deployed_tokens': deployed_tokens,
-                'active_strategies': active_strategies,
-                'total_trades': len(recent_trades)
+                'total_tokens': stats['total_tokens'],
+                'deployed_tokens': stats['deployed_tokens'],
+                'active_strategies': stats['active_strategies'],
+                'total_trades': stats['total_trades'],
+                'networks': stats['networks'],
+                'updated_at': stats['computed_at'].isoformat()
             },
             'recent_tokens': [
                 {
@@ -907,83 +3965,86 @@ async def get_dashboard():
         logger.error(f"Dashboard error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
-# ============= BACKGROUND TASKS =============
+# ============= WEBSOCKET FOR REAL-TIME UPDATES =============
 
-async def deploy_token_background(
-    token_id: str, 
-    network: str, 
-    name: str, 
-    symbol: str, 
-    total_supply: int,
-    tax_rate: int
-):
-    """Deploy token in background"""
-    try:
-        # Update status to deploying
-        await db.tokens.update_one(
-            {'id': token_id},
-            {'$set': {'status': 'deploying'}}
-        )
-        
-        # Deploy contract
-        deployment_result = await blockchain_service.deploy_token(
-            network, name, symbol, total_supply, tax_rate
-        )
-        
-        # Update token with deployment results
-        await db.tokens.update_one(
-            {'id': token_id},
-            {'$set': {
-                'status': 'deployed',
-                'contract_address': deployment_result['contract_address'],
-                'transaction_hash': deployment_result['transaction_hash'],
-                'deployer_address': deployment_result['deployer_address'],
-                'explorer_url': deployment_result['explorer_url'],
-                'deployed_at': datetime.utcnow()
-            }}
-        )
-        
-        logger.info(f"Token {token_id} deployed successfully to {network}")
-        
-    except Exception as e:
-        logger.error(f"Token deployment failed for {token_id}: {e}")
-        
-        # Update status to failed
-        await db.tokens.update_one(
-            {'id': token_id},
-            {'$set': {
-                'status': 'failed',
-                'error': str(e)
-            }}
-        )
+# Per-socket limits for the price feed
+WS_MAX_SUBSCRIPTIONS = int(os.environ.get('WS_MAX_SUBSCRIPTIONS', '100'))
+WS_MAX_PENDING = int(os.environ.get('WS_MAX_PENDING', '32'))
 
-# ============= WEBSOCKET FOR REAL-TIME UPDATES =============
+async def _pump_price_updates(websocket: WebSocket, subscriber: PriceSubscriber):
+    """Send queued price updates to the client"""
+    while True:
+        message = await subscriber.queue.get()
+        await websocket.send_text(message)
 
-@app.websocket("/api/ws/prices/{token_address}")
-async def websocket_price_feed(websocket, token_address: str, network: str = "bsc"):
-    """Real-time price updates via WebSocket"""
+async def serve_price_socket(websocket: WebSocket, initial: List[Tuple[str, str]]):
+    """Serve a price socket; clients send {"action": "subscribe"|"unsubscribe", "tokens": [...]}"""
     await websocket.accept()
     
+    subscriber = PriceSubscriber(WS_MAX_PENDING)
+    subscriptions = set()
+    sender = asyncio.create_task(_pump_price_updates(websocket, subscriber))
+    
+    def subscribe(network: str, token_address: str):
+        if (network, token_address) in subscriptions or len(subscriptions) >= WS_MAX_SUBSCRIPTIONS:
+            return
+        subscriptions.add((network, token_address))
+        price_hub.subscribe(subscriber, network, token_address)
+    
     try:
+        for network, token_address in initial:
+            subscribe(network, token_address)
+        
         while True:
-            # Get current price
-            price_data = await price_service.get_token_price(token_address, network)
-            
-            if price_data:
-                await websocket.send_json({
-                    'token_address': token_address,
-                    'network': network,
-                    'price_data': price_data,
-                    'timestamp': datetime.utcnow().isoformat()
-                })
+            request = await websocket.receive_json()
+            action = request.get('action')
             
-            await asyncio.sleep(5)  # Update every 5 seconds
+            for token in request.get('tokens', []):
+                network = token.get('network', 'bsc')
+                token_address = token.get('token_address')
+                if not token_address:
+                    continue
+                
+                if action == 'subscribe':
+                    subscribe(network, token_address)
+                elif action == 'unsubscribe' and (network, token_address) in subscriptions:
+                    subscriptions.discard((network, token_address))
+                    price_hub.unsubscribe(subscriber, network, token_address)
             
+    except WebSocketDisconnect:
+        pass
     except Exception as e:
         logger.error(f"WebSocket error: {e}")
     finally:
-        await websocket.close()
+        sender.cancel()
+        for network, token_address in subscriptions:
+            price_hub.unsubscribe(subscriber, network, token_address)
+        try:
+            await websocket.close()
+        except Exception:
+            pass
+
+@app.websocket("/api/ws/prices/{token_address}")
+async def websocket_price_feed(websocket: WebSocket, token_address: str, network: str = "bsc"):
+    """Real-time price updates via WebSocket"""
+    await serve_price_socket(websocket, [(network, token_address)])
+
+@app.websocket("/api/ws/prices")
+async def websocket_multi_price_feed(websocket: WebSocket):
+    """Real-time price updates for any number of tokens over one WebSocket"""
+    await serve_price_socket(websocket, [])
 
 if __name__ == "__main__":
+    import sys
+    
+    if sys.argv[1:] == ['provision-solc']:
+        # One-time provisioning step for images and deploy hooks
+        sys.exit(0 if ensure_solc() else 1)
+    
+    if sys.argv[1:] == ['compile-contract']:
+        # Pre-build the on-disk contract cache so workers never compile
+        BlockchainService().compile_contract()
+        sys.exit(0)
+    
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8001)
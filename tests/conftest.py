@@ -0,0 +1,9 @@
+import os
+import sys
+from pathlib import Path
+
+# server.py reads its Mongo settings at import time; the client connects lazily
+os.environ.setdefault('MONGO_URL', 'mongodb://localhost:27017')
+os.environ.setdefault('DB_NAME', 'memeforge_test')
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'backend'))
@@ -0,0 +1,32 @@
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+BACKEND = Path(__file__).resolve().parent.parent / 'backend'
+# Generous for slow CI machines; a regression that imports web3 eagerly costs seconds more
+IMPORT_BUDGET = 5.0
+HEAVY_MODULES = ('web3', 'eth_account', 'solcx')
+
+MEASURE = f"""
+import json, sys, time
+started = time.perf_counter()
+import server
+print(json.dumps({{
+    'seconds': time.perf_counter() - started,
+    'loaded': [name for name in {HEAVY_MODULES!r} if name in sys.modules]
+}}))
+"""
+
+
+def test_server_import_is_cheap():
+    env = dict(os.environ, MONGO_URL='mongodb://localhost:27017', DB_NAME='memeforge_test')
+    result = subprocess.run(
+        [sys.executable, '-c', MEASURE],
+        cwd=BACKEND, env=env, capture_output=True, text=True, timeout=60, check=True
+    )
+    measured = json.loads(result.stdout.strip().splitlines()[-1])
+
+    assert measured['loaded'] == []
+    assert measured['seconds'] < IMPORT_BUDGET
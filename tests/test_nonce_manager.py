@@ -0,0 +1,73 @@
+import asyncio
+
+import pytest
+
+import server
+from server import NonceManager, TransactionPipeline
+
+# Well-known Hardhat test key; never holds real funds
+PRIVATE_KEY = '0xac0974bec39a17e36ba4a6b4d238ff944bacb478cbed5efcae784d7bf4f2ff80'
+
+
+class StubEth:
+    def __init__(self, pending_nonce):
+        self.pending_nonce = pending_nonce
+
+    async def get_transaction_count(self, address, block_identifier):
+        return self.pending_nonce
+
+    async def send_raw_transaction(self, raw_transaction):
+        # Another sender already used this nonce on chain
+        self.pending_nonce += 1
+        raise ValueError('nonce too low')
+
+
+class StubWeb3:
+    def __init__(self, pending_nonce):
+        self.eth = StubEth(pending_nonce)
+
+
+def test_idle_resync_drops_released_nonces():
+    async def scenario():
+        w3 = StubWeb3(5)
+        nonces = NonceManager(resync_interval=0)
+
+        assert await nonces.allocate(w3, 'bsc', '0xabc') == 5
+        nonces.release('bsc', '0xabc', 5)
+
+        # Idle resync picks the chain nonce back up; 5 must not be handed out twice
+        return [await nonces.allocate(w3, 'bsc', '0xabc') for _ in range(2)]
+
+    assert asyncio.run(scenario()) == [5, 6]
+
+
+def test_resync_keeps_gap_below_outstanding_nonces():
+    async def scenario():
+        w3 = StubWeb3(5)
+        nonces = NonceManager(resync_interval=3600)
+
+        assert [await nonces.allocate(w3, 'bsc', '0xabc') for _ in range(3)] == [5, 6, 7]
+        nonces.release('bsc', '0xabc', 5)
+
+        # 6 and 7 are still outstanding and wait behind the gap at 5
+        await nonces.resync(w3, 'bsc', '0xabc')
+        return [await nonces.allocate(w3, 'bsc', '0xabc') for _ in range(2)]
+
+    assert asyncio.run(scenario()) == [5, 8]
+
+
+def test_conflicting_nonce_is_not_released_on_last_attempt(monkeypatch):
+    monkeypatch.setattr(server, 'DEPLOY_SEND_TRANSACTIONS', True)
+
+    async def scenario():
+        w3 = StubWeb3(5)
+        pipeline = TransactionPipeline(max_in_flight=1, max_attempts=1)
+        transaction = {'to': '0x' + '00' * 20, 'value': 0, 'gas': 21000, 'gasPrice': 1, 'chainId': 56}
+
+        with pytest.raises(ValueError):
+            await pipeline.send(w3, 'bsc', transaction, '0xabc', PRIVATE_KEY)
+
+        # The chain already used 5, so the next allocation must not hand it out again
+        return await pipeline.nonces.allocate(w3, 'bsc', '0xabc')
+
+    assert asyncio.run(scenario()) == 6
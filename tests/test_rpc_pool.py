@@ -0,0 +1,143 @@
+import asyncio
+import json
+import time
+
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+import server
+from server import RpcPool
+
+BLOCK_NUMBER = json.dumps({'jsonrpc': '2.0', 'id': 0, 'method': 'eth_blockNumber', 'params': []}).encode()
+
+
+class StubNode:
+    """JSON-RPC endpoint answering every call with a fixed result, or failing on demand"""
+
+    def __init__(self, result, delay=0.0):
+        self.result = result
+        self.delay = delay
+        self.failing = False
+        self.throttled = False
+        self.calls = 0
+        app = web.Application()
+        app.router.add_post('/', self.handle)
+        self.server = TestServer(app)
+
+    async def handle(self, request):
+        self.calls += 1
+        body = await request.json()
+        await asyncio.sleep(self.delay)
+        if self.failing:
+            return web.Response(status=503)
+        if self.throttled:
+            # Public nodes throttle with HTTP 200 and a JSON-RPC error
+            error = {'code': -32005, 'message': 'limit exceeded'}
+            if isinstance(body, list):
+                return web.json_response([{'jsonrpc': '2.0', 'id': call['id'], 'error': error} for call in body])
+            return web.json_response({'jsonrpc': '2.0', 'id': body['id'], 'error': error})
+        if isinstance(body, list):
+            return web.json_response([{'jsonrpc': '2.0', 'id': call['id'], 'result': self.result} for call in body])
+        return web.json_response({'jsonrpc': '2.0', 'id': body['id'], 'result': self.result})
+
+    @property
+    def url(self):
+        return str(self.server.make_url('/'))
+
+
+def run_with_nodes(nodes, scenario):
+    """Start the stub nodes, run scenario(pool) against them and shut everything down"""
+    async def main():
+        for node in nodes:
+            await node.server.start_server()
+        pool = RpcPool('bsc', [node.url for node in nodes])
+        try:
+            return await scenario(pool)
+        finally:
+            await pool.close()
+            for node in nodes:
+                await node.server.close()
+
+    return asyncio.run(main())
+
+
+def test_fails_over_to_next_endpoint():
+    primary, backup = StubNode('0x1'), StubNode('0x2')
+    primary.failing = True
+
+    async def scenario(pool):
+        response = await pool.request(BLOCK_NUMBER)
+        assert response['result'] == '0x2'
+        assert pool.failovers == 1
+        # The failure is charged to latency, so the healthy backup now ranks first
+        assert pool._ranked()[0].url == backup.url
+
+    run_with_nodes([primary, backup], scenario)
+
+
+def test_throttling_errors_count_as_failures(monkeypatch):
+    monkeypatch.setattr(server, 'RPC_BREAKER_THRESHOLD', 2)
+    throttled, backup = StubNode('0x1'), StubNode('0x2')
+    throttled.throttled = True
+
+    async def scenario(pool):
+        (response,) = await pool.batch([('eth_blockNumber', [])])
+        assert response['result'] == '0x2'
+        assert pool.failovers == 1
+        assert pool.endpoints[0].errors == 1
+        assert pool._ranked()[0].url == backup.url
+
+        await pool.probe(timeout=1)
+        assert not pool.endpoints[0].available
+
+        # With every endpoint throttling, callers still get the error response
+        backup.throttled = True
+        response = await pool.request(BLOCK_NUMBER)
+        assert response['error']['code'] == -32005
+
+    run_with_nodes([throttled, backup], scenario)
+
+
+def test_breaker_ejects_and_recovers(monkeypatch):
+    monkeypatch.setattr(server, 'RPC_BREAKER_THRESHOLD', 2)
+    monkeypatch.setattr(server, 'RPC_BREAKER_COOLDOWN', 0.2)
+    flaky, healthy = StubNode('0x1'), StubNode('0x2')
+    flaky.failing = True
+
+    async def scenario(pool):
+        for _ in range(2):
+            await pool.probe(timeout=1)
+        ejected = pool.endpoints[0]
+        assert not ejected.available
+
+        calls = flaky.calls
+        assert (await pool.request(BLOCK_NUMBER))['result'] == '0x2'
+        assert flaky.calls == calls
+
+        # Once the cooldown passes a successful probe closes the breaker again
+        flaky.failing = False
+        await asyncio.sleep(0.25)
+        assert await pool.probe(timeout=1)
+        assert ejected.available and ejected.failures == 0
+
+    run_with_nodes([flaky, healthy], scenario)
+
+
+def test_hedges_slow_light_requests_only(monkeypatch):
+    monkeypatch.setattr(server, 'RPC_HEDGE_DELAY', 0.05)
+    slow, fast = StubNode('0x1', delay=1.0), StubNode('0x2')
+
+    async def scenario(pool):
+        started = time.monotonic()
+        (response,) = await pool.batch([('eth_blockNumber', [])])
+        assert response['result'] == '0x2'
+        assert time.monotonic() - started < 0.5
+        assert pool.hedges == 1
+
+        # eth_getLogs is too heavy to send twice and waits for the slow endpoint
+        pool.endpoints[0].latency = 0.0
+        (response,) = await pool.batch([('eth_getLogs', [{}])])
+        assert response['result'] == '0x1'
+        assert pool.hedges == 1
+
+    run_with_nodes([slow, fast], scenario)
@@ -0,0 +1,162 @@
+import asyncio
+
+import server
+from server import TransferIndexer
+
+TOKEN = '0x' + 'ab' * 20
+DEPLOYER = '0x' + '01' * 20
+HOLDER = '0x' + '02' * 20
+# Contract whose logs the node refuses to serve, even one block at a time
+BROKEN = '0x' + 'cd' * 20
+
+
+def topic(address):
+    return '0x' + '0' * 24 + address[2:]
+
+
+class FakeCursor:
+    def __init__(self, documents):
+        self.documents = documents
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for document in self.documents:
+            yield dict(document)
+
+
+class FakeCollection:
+    """Just enough of a Motor collection for the indexer: documents by _id plus recorded bulk writes"""
+
+    def __init__(self):
+        self.documents = {}
+        self.bulk_ops = []
+
+    async def find_one(self, query):
+        document = self.documents.get(query['_id'])
+        return dict(document) if document else None
+
+    def find(self, query, projection=None):
+        return FakeCursor(list(self.documents.values()))
+
+    async def update_one(self, query, update, upsert=False):
+        document = self.documents.get(query['_id'])
+        if document is None:
+            if not upsert:
+                return
+            document = self.documents[query['_id']] = {'_id': query['_id'], **update.get('$setOnInsert', {})}
+        document.update(update.get('$set', {}))
+
+    async def update_many(self, query, update):
+        pass
+
+    async def bulk_write(self, operations, ordered=True):
+        self.bulk_ops.extend(operations)
+
+
+class FakeDb:
+    def __init__(self):
+        self.collections = {}
+
+    def __getattr__(self, name):
+        return self.collections.setdefault(name, FakeCollection())
+
+
+class FakePool:
+    """Chain whose head moves one block on every other eth_blockNumber call"""
+
+    def __init__(self, head):
+        self.head = head
+        self.head_calls = 0
+        self.scanned = set()
+        self.logs = {102: {
+            'address': TOKEN, 'blockNumber': hex(102), 'blockHash': '0xh102', 'logIndex': '0x0', 'transactionHash': '0x102',
+            'topics': [server.TRANSFER_TOPIC, topic(DEPLOYER), topic(HOLDER)], 'data': hex(5)
+        }}
+
+    async def batch(self, calls):
+        responses = []
+        for method, params in calls:
+            if method == 'eth_blockNumber':
+                self.head_calls += 1
+                if self.head_calls % 2 == 0:
+                    self.head += 1
+                result = hex(self.head)
+            elif method == 'eth_getBlockByNumber':
+                result = {'number': params[0], 'hash': f"0xh{int(params[0], 16)}"}
+            else:
+                query = params[0]
+                addresses = query['address'] if isinstance(query['address'], list) else [query['address']]
+                if BROKEN in addresses:
+                    responses.append({'jsonrpc': '2.0', 'error': {'code': -32005, 'message': 'limit exceeded'}})
+                    continue
+                blocks = range(int(query['fromBlock'], 16), int(query['toBlock'], 16) + 1)
+                result = []
+                if TOKEN in addresses:
+                    self.scanned.update(blocks)
+                    result = [self.logs[block] for block in blocks if block in self.logs]
+            responses.append({'jsonrpc': '2.0', 'result': result})
+        return responses
+
+
+class FakeBlockchainService:
+    def __init__(self, pool):
+        self.pool = pool
+
+    def get_rpc_pool(self, network):
+        return self.pool
+
+
+def test_first_run_backfill_leaves_no_block_gaps(monkeypatch):
+    fake_db = FakeDb()
+    fake_db.tokens.documents['tok'] = {
+        'id': 'tok', 'network': 'bsc', 'status': 'deployed', 'contract_address': TOKEN,
+        'deployer_address': DEPLOYER, 'block_number': 90
+    }
+    monkeypatch.setattr(server, 'db', fake_db)
+    monkeypatch.setenv('INDEXER_CONFIRMATIONS_BSC', '0')
+    monkeypatch.delenv('INDEXER_START_BLOCK_BSC', raising=False)
+    pool = FakePool(head=100)
+    indexer = TransferIndexer(FakeBlockchainService(pool), ['bsc'])
+
+    async def scenario():
+        for _ in range(6):
+            await indexer.index_once('bsc')
+
+    asyncio.run(scenario())
+
+    # Every block from deployment to the latest checkpoint was queried for the token
+    checkpoint = fake_db.index_checkpoints.documents['bsc']['block']
+    assert checkpoint >= 102
+    assert set(range(90, checkpoint + 1)) <= pool.scanned
+    assert any(op._filter['_id'] == 'bsc:0x102:0' for op in fake_db.transfers.bulk_ops)
+
+
+def test_failing_backfill_does_not_stall_the_network(monkeypatch):
+    fake_db = FakeDb()
+    fake_db.tokens.documents['tok'] = {
+        'id': 'tok', 'network': 'bsc', 'status': 'deployed', 'contract_address': TOKEN,
+        'deployer_address': DEPLOYER, 'block_number': 90
+    }
+    fake_db.tokens.documents['broken'] = {
+        'id': 'broken', 'network': 'bsc', 'status': 'deployed', 'contract_address': BROKEN,
+        'deployer_address': DEPLOYER, 'block_number': 50
+    }
+    monkeypatch.setattr(server, 'db', fake_db)
+    monkeypatch.setenv('INDEXER_CONFIRMATIONS_BSC', '0')
+    monkeypatch.setenv('INDEXER_START_BLOCK_BSC', '95')
+    pool = FakePool(head=110)
+    indexer = TransferIndexer(FakeBlockchainService(pool), ['bsc'])
+
+    async def scenario():
+        for _ in range(20):
+            await indexer.index_once('bsc')
+
+    asyncio.run(scenario())
+
+    # The broken address is deferred while the healthy one catches up and the main scan moves on
+    assert fake_db.index_checkpoints.documents['bsc']['block'] >= 110
+    assert set(range(90, 111)) <= pool.scanned
+    assert TOKEN in indexer._addresses['bsc']
+    assert indexer._backfills['bsc'][BROKEN]['retry_at'] > 0